@@ -0,0 +1,65 @@
+"""
+Benchmark PDF text extraction throughput per backend.
+
+Runs every installed backend from pdf_loader over a folder of sample PDFs
+and reports pages/sec, characters extracted and pages skipped. With a
+non-zero --timeout pages go through the child extraction process, as in
+ingestion; --timeout 0 measures the parser alone.
+
+Usage:
+    python benchmarks/bench_pdf_extract.py [folder] [--backends pymupdf,pypdf2] [--timeout 30]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import pdf_loader
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("folder", nargs="?", default=config.PDF_REFERENCE_FOLDER)
+    parser.add_argument("--backends", default=",".join(pdf_loader.available_backends()))
+    parser.add_argument("--timeout", type=float, default=config.PDF_PAGE_TIMEOUT)
+    args = parser.parse_args()
+
+    pdfs = sorted(
+        os.path.join(args.folder, f)
+        for f in os.listdir(args.folder)
+        if f.lower().endswith(".pdf")
+    )
+    if not pdfs:
+        print(f"No PDFs found in {args.folder}")
+        return
+
+    print(f"📚 {len(pdfs)} PDFs in {args.folder}\n")
+    print(f"{'backend':<10} {'pages':>7} {'seconds':>9} {'pages/s':>9} {'chars':>12} {'empty':>6}")
+
+    for name in args.backends.split(","):
+        backend = pdf_loader.BACKENDS.get(name)
+        if backend is None or not backend.available:
+            print(f"{name:<10} not installed")
+            continue
+
+        pages = 0
+        chars = 0
+        empty = 0
+        start = time.perf_counter()
+
+        for path in pdfs:
+            result = pdf_loader.extract_pdf_pages(path, backend=name, timeout=args.timeout) or []
+            pages += len(result)
+            chars += sum(len(p) for p in result)
+            empty += sum(1 for p in result if not p.strip())
+
+        elapsed = time.perf_counter() - start
+        rate = pages / elapsed if elapsed else 0.0
+        print(f"{name:<10} {pages:>7} {elapsed:>9.2f} {rate:>9.1f} {chars:>12} {empty:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,15 +13,51 @@ API_MODEL = os.getenv("API_MODEL", "gpt-oss-120b")
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-mpnet-base-v2")
 EMBEDDING_DIMENSION = int(os.getenv("EMBEDDING_DIMENSION", "768"))
 
+# Persistent chunk-embedding cache (keyed by model + chunk text hash)
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "embedding_cache")
+EMBEDDING_CACHE_MAX_MB = int(os.getenv("EMBEDDING_CACHE_MAX_MB", "2048"))
+EMBEDDING_CACHE_EVICT_STALE = os.getenv("EMBEDDING_CACHE_EVICT_STALE", "true").lower() == "true"
+
 # Milvus Vector Database Configuration
 MILVUS_USERNAME = os.getenv("MILVUS_USERNAME", "db_2a2221794b41642")
 MILVUS_PASSWORD = os.getenv("MILVUS_PASSWORD", "Mb0/k%sBL/a)!BVJ")
 MILVUS_ENDPOINT = os.getenv("MILVUS_ENDPOINT", "https://in03-2a2221794b41642.serverless.aws-eu-central-1.cloud.zilliz.com")
 MILVUS_COLLECTION_NAME = os.getenv("MILVUS_COLLECTION_NAME", "documents")
 MILVUS_DB_NAME = os.getenv("MILVUS_DB_NAME", "bookshelf")
+MILVUS_SUMMARY_COLLECTION_NAME = os.getenv("MILVUS_SUMMARY_COLLECTION_NAME", f"{MILVUS_COLLECTION_NAME}_summaries")
 
 # PDF Management Configuration
 PDF_REFERENCE_FOLDER = os.getenv("PDF_REFERENCE_FOLDER", "pdf_references")
 CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "500"))
 CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "50"))
+PDF_EXTRACT_BACKEND = os.getenv("PDF_EXTRACT_BACKEND", "auto")  # auto | pymupdf | pypdfium2 | pypdf2
+PDF_PAGE_TIMEOUT = float(os.getenv("PDF_PAGE_TIMEOUT", "30"))
+PDF_WORKER_START_TIMEOUT = float(os.getenv("PDF_WORKER_START_TIMEOUT", "120"))
+LIBRARY_STATS_PATH = os.getenv("LIBRARY_STATS_PATH", "library_stats.json")
+
+# Retrieval Context Configuration
+# ±k neighbouring chunks added around each hit (0 disables) and a token cap
+CONTEXT_NEIGHBOURS = int(os.getenv("CONTEXT_NEIGHBOURS", "0"))
+CONTEXT_MAX_NEIGHBOURS = int(os.getenv("CONTEXT_MAX_NEIGHBOURS", "5"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+
+
+# Book Summary Index Configuration
+SUMMARY_INDEX_ENABLED = os.getenv("SUMMARY_INDEX_ENABLED", "true").lower() == "true"
+SUMMARY_CACHE_DIR = os.getenv("SUMMARY_CACHE_DIR", "summary_cache")
+SUMMARY_SECTION_CHARS = int(os.getenv("SUMMARY_SECTION_CHARS", "10000"))
+SUMMARY_REDUCE_GROUP = int(os.getenv("SUMMARY_REDUCE_GROUP", "10"))
+SUMMARY_MAX_CONCURRENCY = int(os.getenv("SUMMARY_MAX_CONCURRENCY", "4"))
+SUMMARY_SEARCH_RESULTS = int(os.getenv("SUMMARY_SEARCH_RESULTS", "5"))
+
+# Chat Session Configuration
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "1800"))
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "500"))
+SESSION_MAX_TURNS = int(os.getenv("SESSION_MAX_TURNS", "3"))
+SESSION_MAX_CHUNKS = int(os.getenv("SESSION_MAX_CHUNKS", "300"))
+SESSION_QUERY_DECAY = float(os.getenv("SESSION_QUERY_DECAY", "0.5"))
 
+# Safety Layer Configuration
+SAFETY_BLOCKLIST_PATH = os.getenv("SAFETY_BLOCKLIST_PATH", "safety_blocklist.txt")
+SAFETY_BLOCKLIST_RELOAD_SECONDS = float(os.getenv("SAFETY_BLOCKLIST_RELOAD_SECONDS", "5"))
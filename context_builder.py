@@ -0,0 +1,164 @@
+import config
+from pdf_loader import stitch_chunks
+
+# Rough characters-per-token ratio used to apply the token budget
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(*texts):
+    return sum(-(-len(t) // CHARS_PER_TOKEN) for t in texts)
+
+
+def _merge_windows(hits, neighbours):
+    """
+    Turn each hit into a [chunk_index - k, chunk_index + k] window and merge
+    overlapping or touching windows of the same file. Each merged window
+    keeps the best (lowest L2) score of the hits inside it.
+    """
+    by_file = {}
+    for hit in hits:
+        idx = hit["chunk_index"]
+        by_file.setdefault(hit["file_name"], []).append(
+            [max(0, idx - neighbours), idx + neighbours, hit["score"]]
+        )
+
+    windows = []
+    for file_name, spans in by_file.items():
+        spans.sort()
+        merged = [spans[0]]
+        for start, end, score in spans[1:]:
+            last = merged[-1]
+            if start <= last[1] + 1:
+                last[1] = max(last[1], end)
+                last[2] = min(last[2], score)
+            else:
+                merged.append([start, end, score])
+
+        windows.extend(
+            {"file_name": file_name, "start": start, "end": end, "score": score}
+            for start, end, score in merged
+        )
+
+    windows.sort(key=lambda w: w["score"])
+    return windows
+
+
+def _trim_to_budget(passages, token_budget):
+    """
+    Keep passages until the budget runs out, cutting the last one short.
+    A cut passage keeps only the keys of chunks that still fit whole.
+    """
+    budget = token_budget * CHARS_PER_TOKEN
+    kept = []
+    for passage in passages:
+        if budget <= 0:
+            break
+        if len(passage["text"]) > budget:
+            # Stitching appends chunk by chunk, so each prefix of the chunks
+            # stitches to a prefix of the passage text
+            whole = 0
+            while (whole < len(passage["chunks"])
+                   and len(stitch_chunks(passage["chunks"][:whole + 1], passage["overlap"])) <= budget):
+                whole += 1
+            passage = dict(passage, text=passage["text"][:budget], keys=passage["keys"][:whole])
+        kept.append(passage)
+        budget -= len(passage["text"])
+    return kept
+
+
+def parse_neighbours(value):
+    """
+    Validate a client-supplied neighbour count: a non-negative integer (or
+    integer string, for form posts), clamped to CONTEXT_MAX_NEIGHBOURS.
+    Raises ValueError otherwise.
+    """
+    if isinstance(value, bool):
+        raise ValueError("neighbours must be an integer")
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    if not isinstance(value, int) or value < 0:
+        raise ValueError("neighbours must be a non-negative integer")
+    return min(value, config.CONTEXT_MAX_NEIGHBOURS)
+
+
+def _default_chunk_settings(file_name):
+    return config.CHUNK_SIZE, config.CHUNK_OVERLAP
+
+
+def expand_hits(milvus, hits, neighbours=None, token_budget=None, cache=None, exclude=None,
+                chunk_settings=None):
+    """
+    Widen search hits with their ±k neighbouring chunks.
+
+    All missing neighbours are fetched with one batched query, overlapping
+    windows are merged and stitched back into continuous passages, and the
+    passages (best hit first) are trimmed to the token budget.
+
+    `cache` maps (file_name, chunk_index) to text; it is consulted before
+    querying Milvus and filled with every chunk seen. Passages made up only
+    of chunks in `exclude` are dropped before the budget is applied. Each
+    passage's `keys` lists the chunks whose text it carries in full.
+    `chunk_settings(file_name)` gives the (chunk_size, overlap) used to
+    stitch neighbouring chunks back together.
+    """
+    neighbours = config.CONTEXT_NEIGHBOURS if neighbours is None else neighbours
+    neighbours = min(neighbours, config.CONTEXT_MAX_NEIGHBOURS)
+    token_budget = token_budget or config.CONTEXT_TOKEN_BUDGET
+    texts = cache if cache is not None else {}
+    exclude = exclude or set()
+    chunk_settings = chunk_settings or _default_chunk_settings
+
+    for h in hits:
+        texts[(h["file_name"], h["chunk_index"])] = h["document"]
+
+    if neighbours <= 0 or not hits:
+        windows = [
+            {"file_name": h["file_name"], "start": h["chunk_index"], "end": h["chunk_index"], "score": h["score"]}
+            for h in hits
+        ]
+    else:
+        windows = _merge_windows(hits, neighbours)
+
+        # Hits already carry their own text; only fetch the rest
+        wanted = {}
+        for w in windows:
+            wanted.setdefault(w["file_name"], []).extend(
+                i for i in range(w["start"], w["end"] + 1)
+                if (w["file_name"], i) not in texts
+            )
+        texts.update(milvus.get_chunks_by_index(wanted))
+
+    passages = []
+    for w in windows:
+        keys = [
+            (w["file_name"], i)
+            for i in range(w["start"], w["end"] + 1)
+            if (w["file_name"], i) in texts
+        ]
+        if all(k in exclude for k in keys):
+            continue
+        _, overlap = chunk_settings(w["file_name"])
+        chunks = [texts[k] for k in keys]
+        passages.append(dict(w, keys=keys, chunks=chunks, overlap=overlap,
+                             text=stitch_chunks(chunks, overlap)))
+
+    return _trim_to_budget(passages, token_budget)
+
+
+def format_context(passages):
+    return "\n\n".join(p["text"] for p in passages)
+
+
+def build_prompt(context, question, follow_up=False):
+    """
+    Assemble the LLM prompt for one turn. Earlier turns of a conversation
+    are sent to the model as separate messages, not folded in here.
+    """
+    parts = []
+    if context:
+        parts.append(f"Context:\n{context}")
+    elif follow_up:
+        parts.append("Context: (no new passages; the relevant ones were given earlier in this conversation)")
+
+    parts.append(f"Question: {question}\n\nAnswer:")
+    return "\n\n".join(parts)
@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+import config
+
+
+def text_hash(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _model_slug(model_name):
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in model_name)
+
+
+class EmbeddingCache:
+    """
+    Persistent chunk-embedding cache keyed by (model, text hash).
+
+    Each model gets its own directory holding an append-only `vectors.f32`
+    file of float32 rows (read back through a memory map) and an append-only
+    `index.txt` of "<hash> <row>" lines that is loaded into a dict on startup.
+    """
+
+    def __init__(self, cache_dir=None, model_name=None, dimension=None, max_bytes=None):
+        self.cache_dir = cache_dir or config.EMBEDDING_CACHE_DIR
+        self.model_name = model_name or config.EMBEDDING_MODEL
+        self.dimension = dimension or config.EMBEDDING_DIMENSION
+        self.max_bytes = config.EMBEDDING_CACHE_MAX_MB * 1024 * 1024 if max_bytes is None else max_bytes
+
+        self.model_dir = os.path.join(self.cache_dir, _model_slug(self.model_name))
+        self.vectors_path = os.path.join(self.model_dir, "vectors.f32")
+        self.index_path = os.path.join(self.model_dir, "index.txt")
+        self.meta_path = os.path.join(self.model_dir, "meta.json")
+
+        self._lock = threading.Lock()
+        self._index = {}
+        self._rows = 0
+        self._mmap = None
+
+        os.makedirs(self.model_dir, exist_ok=True)
+        self._load()
+
+    # ---------------------------------------------------------
+    # Loading
+    # ---------------------------------------------------------
+    def _load(self):
+        meta = {}
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+
+        if meta.get("dimension", self.dimension) != self.dimension:
+            print(f"⚠️ Embedding cache dimension changed, resetting {self.model_dir}")
+            self._reset_files()
+
+        with open(self.meta_path, "w") as f:
+            json.dump({"model": self.model_name, "dimension": self.dimension}, f)
+
+        row_bytes = self.dimension * 4
+        size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        self._rows = size // row_bytes
+
+        if size % row_bytes:
+            # Drop a partially written trailing row left by a crash
+            with open(self.vectors_path, "r+b") as f:
+                f.truncate(self._rows * row_bytes)
+
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) != 2:
+                        continue
+                    row = int(parts[1])
+                    if row < self._rows:
+                        self._index[parts[0]] = row
+
+        print(f"✓ Embedding cache: {len(self._index)} vectors for {self.model_name}")
+
+    def _reset_files(self):
+        for path in (self.vectors_path, self.index_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self._index = {}
+        self._rows = 0
+        self._mmap = None
+
+    def _vectors(self):
+        if self._mmap is None or len(self._mmap) < self._rows:
+            self._mmap = np.memmap(
+                self.vectors_path, dtype=np.float32, mode="r",
+                shape=(self._rows, self.dimension)
+            )
+        return self._mmap
+
+    # ---------------------------------------------------------
+    # Lookup / insert
+    # ---------------------------------------------------------
+    def get_many(self, texts):
+        """Return a list aligned with `texts`: the cached vector or None."""
+        with self._lock:
+            rows = [self._index.get(text_hash(t)) for t in texts]
+            if self._rows == 0:
+                return [None] * len(texts)
+
+            vectors = self._vectors()
+            return [np.array(vectors[r]) if r is not None else None for r in rows]
+
+    def put_many(self, texts, embeddings):
+        with self._lock:
+            new = {}
+            for text, emb in zip(texts, embeddings):
+                key = text_hash(text)
+                if key not in self._index and key not in new:
+                    new[key] = np.asarray(emb, dtype=np.float32).reshape(self.dimension)
+
+            if not new:
+                return
+
+            self._enforce_limit(len(new) * self.dimension * 4)
+
+            with open(self.vectors_path, "ab") as f:
+                f.write(np.stack(list(new.values())).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+            # Index lines are written after their vectors so a crash never
+            # leaves an index entry pointing at missing data
+            lines = []
+            for offset, key in enumerate(new):
+                self._index[key] = self._rows + offset
+                lines.append(f"{key} {self._rows + offset}\n")
+            self._rows += len(new)
+
+            with open(self.index_path, "a") as f:
+                f.writelines(lines)
+
+    # ---------------------------------------------------------
+    # Size limits / eviction
+    # ---------------------------------------------------------
+    def _dir_size(self, path):
+        total = 0
+        for root, _, files in os.walk(path):
+            for name in files:
+                total += os.path.getsize(os.path.join(root, name))
+        return total
+
+    def evict_stale_models(self):
+        """Delete cache directories of every model other than the active one."""
+        removed = 0
+        for entry in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, entry)
+            if os.path.isdir(path) and path != self.model_dir:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+                print(f"🗑️ Evicted stale embedding cache: {entry}")
+        return removed
+
+    def _enforce_limit(self, incoming):
+        if not self.max_bytes:
+            return
+
+        if self._dir_size(self.cache_dir) + incoming <= self.max_bytes:
+            return
+
+        self.evict_stale_models()
+
+        if self._dir_size(self.cache_dir) + incoming > self.max_bytes:
+            # Append-only files can't drop single rows, so start over
+            print("⚠️ Embedding cache over size limit, clearing")
+            self._reset_files()
+
+    def clear(self):
+        with self._lock:
+            self._reset_files()
+
+    def __len__(self):
+        return len(self._index)
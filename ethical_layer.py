@@ -2,39 +2,221 @@ import re
 import openai
 import config
 import os
+import threading
+import time
 
 os.environ.pop("HTTP_PROXY", None)
 os.environ.pop("HTTPS_PROXY", None)
 os.environ.pop("ALL_PROXY", None)
+DEFAULT_BLOCKLIST = [
+    "hate",
+    "kill",
+    "violence",
+    "genocide",
+    "racial superiority",
+    "ethnic cleansing",
+]
+
+REDACTION = "[redacted]"
+
+ETHICAL_FOOTER = "\n\nNote: Interpret all book content responsibly. Context matters, and ideas should be evaluated with respect, accuracy, and fairness."
+
+
+def _build_trie(terms):
+    trie = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+    return trie
+
+
+def _trie_to_regex(node):
+    """
+    Turn a character trie into one prefix-factored alternation, so the
+    regex engine walks shared prefixes once instead of trying every term
+    at every position.
+    """
+    optional = "" in node
+    alternatives = [
+        re.escape(ch) + _trie_to_regex(child)
+        for ch, child in sorted(node.items())
+        if ch
+    ]
+
+    if not alternatives:
+        return ""
+    if len(alternatives) == 1 and not optional:
+        return alternatives[0]
+
+    group = "(?:" + "|".join(alternatives) + ")"
+    return group + "?" if optional else group
+
+
+def load_blocklist(path):
+    """Read one term per line; blank lines and `#` comments are ignored."""
+    with open(path, encoding="utf-8") as f:
+        terms = [line.split("#", 1)[0].strip() for line in f]
+    return [t for t in terms if t]
+
+
+def compile_blocklist(terms):
+    terms = {" ".join(t.lower().split()) for t in terms if t.strip()}
+    if not terms:
+        return None
+    return re.compile(r"\b" + _trie_to_regex(_build_trie(terms)) + r"\b", re.IGNORECASE)
+
+
+class SafetyFilter:
+    """
+    Single-pass blocklist redaction backed by one precompiled regex.
+
+    The blocklist file is re-read whenever its mtime changes (checked at most
+    every `reload_interval` seconds), so terms can be edited without a restart.
+    """
+
+    def __init__(self, path=None, reload_interval=None):
+        self.path = path or config.SAFETY_BLOCKLIST_PATH
+        self.reload_interval = (
+            config.SAFETY_BLOCKLIST_RELOAD_SECONDS if reload_interval is None else reload_interval
+        )
+
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked_at = 0.0
+        self.pattern = None
+        self.max_term_length = 0
+
+        self._set_terms(DEFAULT_BLOCKLIST)
+        self.maybe_reload(force=True)
+
+    def _set_terms(self, terms):
+        self.pattern = compile_blocklist(terms)
+        self.max_term_length = max((len(t) for t in terms), default=0)
+        self.terms = list(terms)
+
+    def maybe_reload(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.reload_interval:
+            return
+
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                return
+
+            if mtime == self._mtime:
+                return
+
+            try:
+                terms = load_blocklist(self.path)
+                self._set_terms(terms)
+                self._mtime = mtime
+                print(f"✓ Loaded {len(terms)} safety blocklist terms from {self.path}")
+            except Exception as e:
+                print(f"⚠️ Could not reload safety blocklist: {e}")
+
+    def _redact_span(self, text, start, stop=None):
+        """
+        Redact matches that begin in text[start:stop]. Returns the output and
+        the position up to which `text` has been consumed.
+        """
+        pattern = self.pattern
+        if pattern is None:
+            end = len(text) if stop is None else stop
+            return text[start:end], end
+
+        out = []
+        pos = start
+        for m in pattern.finditer(text, start):
+            if stop is not None and m.start() >= stop:
+                break
+            out.append(text[pos:m.start()])
+            out.append(REDACTION)
+            pos = m.end()
+
+        end = len(text) if stop is None else max(pos, stop)
+        out.append(text[pos:end])
+        return "".join(out), end
+
+    def redact(self, text):
+        self.maybe_reload()
+        if self.pattern is None:
+            return text
+        return self.pattern.sub(REDACTION, text)
+
+    def redact_stream(self, chunks):
+        """
+        Redact an iterable of text chunks incrementally. Only a tail as long
+        as the longest term is held back, so terms split across chunk
+        boundaries are still caught.
+        """
+        self.maybe_reload()
+        holdback = self.max_term_length + 1
+
+        buf = ""
+        start = 0
+        for chunk in chunks:
+            buf += chunk
+            stop = len(buf) - holdback
+            if stop <= start:
+                continue
+
+            out, consumed = self._redact_span(buf, start, stop)
+            if out:
+                yield out
+
+            # Keep one consumed character so \b still sees the left context
+            keep = max(consumed - 1, 0)
+            buf = buf[keep:]
+            start = consumed - keep
+
+        out, _ = self._redact_span(buf, start)
+        if out:
+            yield out
+
+
+_SAFETY_FILTER = None
+_SAFETY_FILTER_LOCK = threading.Lock()
+
+
+def get_safety_filter():
+    global _SAFETY_FILTER
+    with _SAFETY_FILTER_LOCK:
+        if _SAFETY_FILTER is None:
+            _SAFETY_FILTER = SafetyFilter()
+    return _SAFETY_FILTER
+
+
 def apply_safety_layer(text):
     """
     Generic safety layer for *any* uploaded book.
     Prevents harmful, hateful, or defamatory outputs.
     """
 
-    # List of harmful content categories (generic, not book-specific)
-    blocked_patterns = [
-        r"\bhate\b",
-        r"\bkill\b",
-        r"\bviolence\b",
-        r"\bgenocide\b",
-        r"\bracial superiority\b",
-        r"\betnic cleansing\b"
-    ]
-
-    # Remove/soften harmful phrases
-    for pattern in blocked_patterns:
-        if re.search(pattern, text, re.IGNORECASE):
-            text = re.sub(pattern, "[redacted]", text, flags=re.IGNORECASE)
+    # Remove/soften harmful phrases in a single pass
+    text = get_safety_filter().redact(text)
 
     # Add a **neutral**, universal ethical footer
-    text += "\n\nNote: Interpret all book content responsibly. Context matters, and ideas should be evaluated with respect, accuracy, and fairness."
+    text += ETHICAL_FOOTER
 
     return text
 
 
-def generate_safe_response(prompt, api_model=config.API_MODEL):
-    """Generate response using OpenAI-compatible API + universal safety layer."""
+def apply_safety_layer_stream(chunks):
+    """Streaming variant of apply_safety_layer for incrementally generated text."""
+    yield from get_safety_filter().redact_stream(chunks)
+    yield ETHICAL_FOOTER
+
+
+def generate_response(prompt, api_model=config.API_MODEL, history=None):
+    """
+    Raw LLM completion without the safety layer. `history` is a list of
+    earlier chat messages sent ahead of the prompt. Returns None on failure.
+    """
 
     try:
         # Initialize OpenAI client with custom base URL and API key
@@ -47,7 +229,7 @@ def generate_safe_response(prompt, api_model=config.API_MODEL):
         # Call the API with chat completions
         response = client.chat.completions.create(
             model=api_model,
-            messages=[
+            messages=list(history or []) + [
                 {
                     "role": "user",
                     "content": prompt
@@ -55,10 +237,22 @@ def generate_safe_response(prompt, api_model=config.API_MODEL):
             ]
         )
 
-        llm_output = response.choices[0].message.content
-        safe_output = apply_safety_layer(llm_output)
-        return safe_output
+        return response.choices[0].message.content
 
+    except Exception as e:
+        print(f"Error generating response: {e}")
+        return None
+
+
+def generate_safe_response(prompt, api_model=config.API_MODEL, history=None):
+    """Generate response using OpenAI-compatible API + universal safety layer."""
+
+    llm_output = generate_response(prompt, api_model, history)
+    if llm_output is None:
+        return "An error occurred while generating the response."
+
+    try:
+        return apply_safety_layer(llm_output)
     except Exception as e:
         print(f"Error generating response: {e}")
         return "An error occurred while generating the response."
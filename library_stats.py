@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+import config
+from pdf_loader import INFER_SAMPLE_CHUNKS, infer_overlap
+
+
+class LibraryStats:
+    """
+    In-memory snapshot of per-book statistics behind `/status`. Its
+    `updated_at` doubles as the library version sessions check their caches
+    against.
+
+    Milvus is scanned once at startup to get chunk counts; afterwards
+    ingestion, replace, re-chunk and delete update the snapshot directly.
+    Metadata Milvus doesn't hold (pages, bytes, ingestion time, model and
+    the chunk size/overlap the book was split with) is persisted to a small
+    JSON file so it survives restarts.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or config.LIBRARY_STATS_PATH
+        self.books = {}
+        self.updated_at = None
+
+        self._lock = threading.Lock()
+        self._payload = None
+        self._etag = None
+
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                self.books = json.load(f).get("books", {})
+        except Exception as e:
+            print(f"⚠️ Could not read library stats: {e}")
+
+    def _save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"books": self.books}, f)
+        os.replace(tmp, self.path)
+
+    def _changed(self):
+        """Drop the cached payload and persist; callers hold the lock."""
+        self.updated_at = time.time()
+        self._payload = None
+        self._etag = None
+        try:
+            self._save()
+        except Exception as e:
+            print(f"⚠️ Could not save library stats: {e}")
+
+    def _infer_settings(self, milvus, name):
+        """
+        Chunk settings for a book stored before they were recorded, read off
+        its leading chunks (the longest one approximates the chunk size).
+        Books with a single chunk fall back to the config.
+        """
+        texts = milvus.get_chunks_by_index({name: range(INFER_SAMPLE_CHUNKS)})
+        sample = [texts[k] for k in sorted(texts)]
+
+        overlap = infer_overlap(sample)
+        if overlap is None:
+            return config.CHUNK_SIZE, config.CHUNK_OVERLAP
+
+        chunk_size = max(len(c) for c in sample)
+        print(f"ℹ️ Recorded chunk settings for {name}: size≈{chunk_size}, overlap={overlap}")
+        return chunk_size, overlap
+
+    def refresh_from_milvus(self, milvus, pdf_folder=None):
+        """
+        One full scan of the collection to reconcile chunk counts. Books seen
+        for the first time get their chunk settings recorded, so a later
+        config change can't be mistaken for the settings they were split with.
+        """
+        pdf_folder = pdf_folder or config.PDF_REFERENCE_FOLDER
+
+        counts = Counter()
+        try:
+            for batch in milvus.iter_batches(output_fields=("file_name",), batch_size=5000):
+                counts.update(r["file_name"] for r in batch)
+        except Exception as e:
+            print(f"✗ Could not scan collection for library stats: {e}")
+            return
+
+        unrecorded = [name for name in counts if "chunk_overlap" not in self.books.get(name, {})]
+        settings = {name: self._infer_settings(milvus, name) for name in unrecorded}
+
+        with self._lock:
+            books = {}
+            for name, chunks in counts.items():
+                book = dict(self.books.get(name, {}))
+                book["chunks"] = chunks
+                if name in settings:
+                    book["chunk_size"], book["chunk_overlap"] = settings[name]
+
+                path = os.path.join(pdf_folder, name)
+                if "bytes" not in book and os.path.exists(path):
+                    book["bytes"] = os.path.getsize(path)
+                    book.setdefault("ingested_at", os.path.getmtime(path))
+
+                books[name] = book
+
+            self.books = books
+            self._changed()
+
+        print(f"✓ Library stats: {len(counts)} books, {sum(counts.values())} chunks")
+
+    def record_book(self, name, chunks, pages=None, size=None, model=None, chunk_size=None, overlap=None):
+        with self._lock:
+            self.books[name] = {
+                "chunks": chunks,
+                "pages": pages,
+                "bytes": size,
+                "ingested_at": time.time(),
+                "model": model or config.EMBEDDING_MODEL,
+                "chunk_size": chunk_size or config.CHUNK_SIZE,
+                "chunk_overlap": config.CHUNK_OVERLAP if overlap is None else overlap,
+            }
+            self._changed()
+
+    def update_chunks(self, name, chunks, chunk_size, overlap):
+        with self._lock:
+            book = self.books.setdefault(name, {})
+            book["chunks"] = chunks
+            book["chunk_size"] = chunk_size
+            book["chunk_overlap"] = overlap
+            self._changed()
+
+    def touch(self):
+        """Mark the library changed when stored chunks change without a stats update."""
+        with self._lock:
+            self._changed()
+
+    def chunk_settings(self, name):
+        """
+        The (chunk_size, overlap) a book was split with. Only books not yet
+        seen by refresh_from_milvus fall back to the current config.
+        """
+        book = self.books.get(name, {})
+        return (
+            book.get("chunk_size", config.CHUNK_SIZE),
+            book.get("chunk_overlap", config.CHUNK_OVERLAP),
+        )
+
+    def remove_book(self, name):
+        with self._lock:
+            if self.books.pop(name, None) is not None:
+                self._changed()
+
+    def snapshot(self):
+        """Return the cached `(payload, etag)`, rebuilding it only after a change."""
+        with self._lock:
+            if self._payload is None:
+                books = {name: dict(book) for name, book in sorted(self.books.items())}
+                self._payload = {
+                    "status": "running",
+                    "embedded_files": list(books),
+                    "total_files": len(books),
+                    "total_chunks": sum(b.get("chunks", 0) for b in books.values()),
+                    "books": books,
+                    "updated_at": self.updated_at,
+                }
+                body = json.dumps(self._payload, sort_keys=True).encode("utf-8")
+                self._etag = hashlib.sha1(body).hexdigest()
+
+            return self._payload, self._etag
@@ -1,4 +1,5 @@
 import ethical_layer
+import context_builder
 import logging
 import threading
 from flask import Flask, request, jsonify, render_template
@@ -7,6 +8,11 @@ from flask import Flask, request, jsonify, render_template
 from embedding_utils import EmbeddingManager
 from milvus_manager import MilvusManager
 from pdf_manager import PDFManager
+from pdf_loader import validate_chunk_settings
+from library_stats import LibraryStats
+from session_store import SessionStore
+from summary_index import SummaryIndexer, format_summary_context, is_broad_question
+import config
 
 
 # -------------------------------------------------------------
@@ -30,13 +36,20 @@ app.logger.info("\n🚀 AI-Bookshelf Application initializing...\n")
 embedding_manager = None
 milvus_manager = None
 pdf_manager = None
+summary_indexer = None
+
+# Per-book statistics served by /status; kept current by PDFManager
+library_stats = LibraryStats()
+
+# Multi-turn chat sessions used by /query when a session_id is sent
+session_store = SessionStore()
 
 
 # -------------------------------------------------------------
 # BACKGROUND INITIALIZATION (HF Spaces safe)
 # -------------------------------------------------------------
 def init_in_background():
-    global embedding_manager, milvus_manager, pdf_manager
+    global embedding_manager, milvus_manager, pdf_manager, summary_indexer
 
     try:
         app.logger.info("🔧 Initializing embedding + Milvus managers...")
@@ -47,8 +60,23 @@ def init_in_background():
         # Connect Milvus only once
         milvus_manager = MilvusManager()
 
+        # One chunk scan to seed /status; ingestion keeps it current afterwards
+        library_stats.refresh_from_milvus(milvus_manager)
+
+        # Secondary collection of section/book summaries for broad questions
+        if config.SUMMARY_INDEX_ENABLED:
+            summary_indexer = SummaryIndexer(
+                embedding_manager,
+                milvus_manager,
+                MilvusManager(collection_name=config.MILVUS_SUMMARY_COLLECTION_NAME),
+                chunk_settings=library_stats.chunk_settings
+            )
+
         # PDFManager now uses the same managers
-        pdf_manager = PDFManager(embedding_manager, milvus_manager)
+        pdf_manager = PDFManager(
+            embedding_manager, milvus_manager,
+            stats=library_stats, summaries=summary_indexer
+        )
 
         app.logger.info("📂 Processing PDFs...")
         processed, skipped = pdf_manager.process_new_pdfs()
@@ -57,12 +85,20 @@ def init_in_background():
             f"✓ Initialization complete! processed={processed}, skipped={skipped}"
         )
 
+        # Catch up on books ingested before the summary index existed;
+        # unchanged books are skipped by content hash
+        if summary_indexer is not None:
+            summary_indexer.schedule()
+
     except Exception:
         app.logger.exception("❌ Background initialization failed")
 
 
-# Start initialization the moment the module loads
-threading.Thread(target=init_in_background, daemon=True).start()
+# Start initialization the moment the module loads. PDF extraction children
+# are spawned and re-import this module as __mp_main__ (before
+# multiprocessing.parent_process() is set there); they must not init.
+if __name__ != "__mp_main__":
+    threading.Thread(target=init_in_background, daemon=True).start()
 
 
 # -------------------------------------------------------------
@@ -88,8 +124,12 @@ def home():
                     if not results:
                         response = "No relevant information found."
                     else:
-                        context = "\n".join([r["document"] for r in results])
-                        prompt = f"Context:\n{context}\n\nQuestion: {user_query}\n\nAnswer:"
+                        context = context_builder.format_context(
+                            context_builder.expand_hits(
+                                milvus_manager, results, chunk_settings=library_stats.chunk_settings
+                            )
+                        )
+                        prompt = context_builder.build_prompt(context, user_query)
                         response = ethical_layer.generate_safe_response(prompt)
 
                 except Exception as e:
@@ -114,8 +154,9 @@ def upload_pdf():
     save_path = f"pdf_references/{file.filename}"
     file.save(save_path)
 
+    # The file on disk was just overwritten, so re-embed it if the name exists
     success = (
-        pdf_manager.add_pdf_manually(save_path)
+        pdf_manager.add_pdf_manually(save_path, replace=True)
         if pdf_manager is not None
         else False
     )
@@ -124,6 +165,11 @@ def upload_pdf():
     return render_template("index.html", upload_message=msg)
 
 
+def _prompt_tokens(prompt, history):
+    """Estimated input tokens of one LLM call, replayed history included."""
+    return context_builder.estimate_tokens(prompt, *(m["content"] for m in history or []))
+
+
 @app.route("/query", methods=["POST"])
 def query_api():
     try:
@@ -133,50 +179,161 @@ def query_api():
         if not query:
             return jsonify({"error": "Missing query"}), 400
 
+        neighbours = payload.get("neighbours")
+        if neighbours is not None:
+            try:
+                neighbours = context_builder.parse_neighbours(neighbours)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+
         if embedding_manager is None:
             return jsonify({"error": "Initializing, try again soon"}), 503
 
+        # Sending a session_id (even empty) opts into multi-turn retrieval;
+        # unknown or expired ids get a fresh session
+        session = (
+            session_store.get_or_create(payload.get("session_id"))
+            if "session_id" in payload
+            else None
+        )
+
         emb = embedding_manager.embed_text(query)
-        results = milvus_manager.search_embeddings(emb, n=5)
+
+        # Whole-book questions are answered from precomputed summaries
+        if summary_indexer is not None and is_broad_question(query):
+            summaries = summary_indexer.search(emb)
+            if summaries:
+                context = format_summary_context(summaries)
+                prompt = context_builder.build_prompt(context, query)
+                history = None
+                if session:
+                    history, _ = session.history(
+                        config.CONTEXT_TOKEN_BUDGET - context_builder.estimate_tokens(prompt)
+                    )
+                answer = ethical_layer.generate_safe_response(prompt, history=history)
+
+                response = {
+                    "context": context,
+                    "answer": answer,
+                    "file_names": list({r["file_name"] for r in summaries}),
+                    "num_results": len(summaries),
+                    "route": "summary",
+                    "prompt_tokens": _prompt_tokens(prompt, history)
+                }
+                if session:
+                    session.add_turn(query, prompt, answer.replace(ethical_layer.ETHICAL_FOOTER, ""), emb)
+                    response["session_id"] = session.id
+                return jsonify(response)
+
+        search_emb = session.combined_embedding(emb) if session else emb
+        results = milvus_manager.search_embeddings(search_emb, n=5)
 
         if not results:
-            return jsonify({
+            response = {
                 "context": "",
                 "answer": "No relevant information found.",
                 "file_names": []
-            }), 200
+            }
+            if session:
+                response["session_id"] = session.id
+            return jsonify(response), 200
+
+        if session:
+            session.sync_library(library_stats.updated_at)
+
+            # Earlier prompts are replayed as messages, so chunks they carried
+            # in full are left out. One token budget covers the new context
+            # and the replay; when older turns lose their context to fit, the
+            # chunks they carried become eligible again and the context is
+            # rebuilt (at most one extra pass per retained turn).
+            cache = dict(session.chunks)
+            sent = session.sent_keys()
+            while True:
+                passages = context_builder.expand_hits(
+                    milvus_manager, results, neighbours=neighbours,
+                    cache=cache, exclude=sent,
+                    chunk_settings=library_stats.chunk_settings
+                )
+                context = context_builder.format_context(passages)
+                prompt = context_builder.build_prompt(context, query, follow_up=bool(session.turns))
+                history, replayed = session.history(
+                    config.CONTEXT_TOKEN_BUDGET - context_builder.estimate_tokens(prompt)
+                )
+                if replayed == sent:
+                    break
+                sent = replayed
+            session.remember_chunks({k: cache[k] for p in passages for k in p["keys"]})
+        else:
+            passages = context_builder.expand_hits(
+                milvus_manager, results, neighbours=neighbours,
+                chunk_settings=library_stats.chunk_settings
+            )
+            context = context_builder.format_context(passages)
+            prompt = context_builder.build_prompt(context, query)
+            history = None
 
-        context = "\n".join([r["document"] for r in results])
         file_names = list({r["file_name"] for r in results})
+        answer = ethical_layer.generate_safe_response(prompt, history=history)
 
-        answer = ethical_layer.generate_safe_response(
-            f"Context:\n{context}\n\nQuestion: {query}\n\nAnswer:"
-        )
-
-        return jsonify({
+        response = {
             "context": context,
             "answer": answer,
             "file_names": file_names,
-            "num_results": len(results)
-        })
+            "num_results": len(results),
+            "prompt_tokens": _prompt_tokens(prompt, history)
+        }
+
+        if session:
+            session.add_turn(
+                query, prompt, answer.replace(ethical_layer.ETHICAL_FOOTER, ""), emb,
+                keys=[k for p in passages for k in p["keys"]]
+            )
+            response["session_id"] = session.id
+            response["new_passages"] = len(passages)
+
+        return jsonify(response)
 
     except Exception as e:
         app.logger.exception("❌ Error in /query")
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/summaries/rebuild", methods=["POST"])
+def rebuild_summaries():
+    if summary_indexer is None:
+        return jsonify({"error": "Summary index unavailable"}), 503
+
+    data = request.get_json(silent=True) or {}
+    file_name = data.get("file_name")
+
+    summary_indexer.schedule([file_name] if file_name else None)
+    return jsonify({"success": True, "scheduled": file_name or "all"}), 202
+
+
+@app.route("/session", methods=["POST"])
+def create_session():
+    session = session_store.create()
+    return jsonify({"session_id": session.id}), 200
+
+
+@app.route("/session/<session_id>", methods=["DELETE"])
+def delete_session(session_id):
+    deleted = session_store.delete(session_id)
+    return jsonify({"success": deleted}), 200 if deleted else 404
+
+
 @app.route("/status")
 def status():
     if milvus_manager is None:
         return jsonify({"status": "initializing"}), 200
 
-    files = milvus_manager.get_all_embedded_files()
+    payload, etag = library_stats.snapshot()
 
-    return jsonify({
-        "status": "running",
-        "embedded_files": list(files),
-        "total_files": len(files)
-    }), 200
+    # Clients send If-None-Match and get an empty 304 while nothing changed
+    response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
 
 
 @app.route("/add-pdf", methods=["POST"])
@@ -189,7 +346,7 @@ def add_pdf():
             return jsonify({"error": "pdf_path missing"}), 400
 
         success = (
-            pdf_manager.add_pdf_manually(pdf_path)
+            pdf_manager.add_pdf_manually(pdf_path, replace=bool(data.get("replace")))
             if pdf_manager
             else False
         )
@@ -200,6 +357,89 @@ def add_pdf():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/replace-pdf", methods=["POST"])
+def replace_pdf():
+    try:
+        data = request.get_json()
+        pdf_path = data.get("pdf_path")
+
+        if not pdf_path:
+            return jsonify({"error": "pdf_path missing"}), 400
+
+        success = (
+            pdf_manager.replace_pdf(pdf_path)
+            if pdf_manager
+            else False
+        )
+
+        return jsonify({"success": success}), 200 if success else 400
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/delete-pdf", methods=["POST"])
+def delete_pdf():
+    try:
+        data = request.get_json()
+        file_name = data.get("file_name")
+
+        if not file_name:
+            return jsonify({"error": "file_name missing"}), 400
+
+        success = (
+            pdf_manager.delete_pdf(file_name, remove_file=data.get("remove_file", True))
+            if pdf_manager
+            else False
+        )
+
+        return jsonify({"success": success}), 200 if success else 400
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/rechunk", methods=["POST"])
+def rechunk():
+    try:
+        data = request.get_json() or {}
+        file_name = data.get("file_name")
+        chunk_size = data.get("chunk_size", config.CHUNK_SIZE)
+        overlap = data.get("overlap", config.CHUNK_OVERLAP)
+
+        try:
+            validate_chunk_settings(chunk_size, overlap)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        if pdf_manager is None:
+            return jsonify({"error": "Initializing, try again soon"}), 503
+
+        if file_name and not milvus_manager.has_file(file_name):
+            return jsonify({"error": f"Not embedded: {file_name}"}), 404
+
+        # A whole library can take far longer than a worker timeout, so the
+        # work runs in the background; poll GET /rechunk for progress
+        scheduled = pdf_manager.schedule_rechunk(
+            [file_name] if file_name else None, chunk_size=chunk_size, overlap=overlap
+        )
+        if not scheduled:
+            return jsonify({"error": "A re-chunk is already running", "status": pdf_manager.rechunk_status}), 409
+
+        return jsonify({"success": True, "scheduled": file_name or "all"}), 202
+
+    except Exception as e:
+        app.logger.exception("❌ Error in /rechunk")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/rechunk", methods=["GET"])
+def rechunk_status():
+    if pdf_manager is None:
+        return jsonify({"status": "initializing"}), 200
+    return jsonify(pdf_manager.rechunk_status), 200
+
+
 @app.route("/healthz")
 def health():
     return "ok", 200
@@ -3,11 +3,25 @@ import config
 import uuid
 import time
 
+
+def _quote(value):
+    """Quote a string literal for a Milvus boolean expression."""
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _quote_list(values):
+    return "[" + ", ".join(_quote(v) for v in values) + "]"
+
+
+def _file_expr(file_name):
+    return f"file_name == {_quote(file_name)}"
+
+
 class MilvusManager:
     """Manages Milvus connection and vector operations."""
 
-    def __init__(self):
-        self.collection_name = config.MILVUS_COLLECTION_NAME
+    def __init__(self, collection_name=None):
+        self.collection_name = collection_name or config.MILVUS_COLLECTION_NAME
         self.db_name = config.MILVUS_DB_NAME
         self.collection = None
 
@@ -87,7 +101,7 @@ class MilvusManager:
             ids = [str(uuid.uuid4()) for _ in chunks]
             file_names = [file_name] * len(chunks)
             indices = list(range(len(chunks)))
-            embeds = [e.tolist() for e in embeddings]
+            embeds = [e.tolist() if hasattr(e, "tolist") else list(e) for e in embeddings]
 
             data = [ids, file_names, indices, chunks, embeds]
             self.collection.insert(data)
@@ -129,10 +143,129 @@ class MilvusManager:
             print(f"✗ Search error: {e}")
             return []
 
+    def iter_batches(self, expr='id != ""', output_fields=("file_name", "chunk_index", "text", "embedding"), batch_size=1000):
+        """Stream rows matching `expr` in bounded batches via a query iterator."""
+        iterator = self.collection.query_iterator(
+            batch_size=batch_size,
+            expr=expr,
+            output_fields=["id", *output_fields]
+        )
+        try:
+            while True:
+                batch = iterator.next()
+                if not batch:
+                    break
+                yield batch
+        finally:
+            iterator.close()
+
+    def count_rows(self, expr='id != ""'):
+        """Live row count; unlike num_entities it excludes deleted rows."""
+        rows = self.collection.query(expr=expr, output_fields=["count(*)"])
+        return rows[0]["count(*)"]
+
+    def insert_rows(self, ids, file_names, indices, texts, embeddings):
+        """Insert pre-built columns as-is; the caller decides when to flush."""
+        self.collection.insert([ids, file_names, indices, texts, embeddings])
+
+    def flush(self):
+        self.collection.flush()
+
+    def get_file_chunks(self, file_name, output_fields=("chunk_index", "text", "embedding"), batch_size=1000):
+        """Fetch every stored row for one file, ordered by chunk_index."""
+        try:
+            rows = []
+            for batch in self.iter_batches(_file_expr(file_name), output_fields, batch_size):
+                rows.extend(batch)
+
+            rows.sort(key=lambda r: r.get("chunk_index", 0))
+            return rows
+
+        except Exception as e:
+            print(f"✗ Error fetching chunks for {file_name}: {e}")
+            return []
+
+    def get_chunks_by_index(self, wanted):
+        """
+        Fetch specific chunks in one round trip. `wanted` maps file_name to
+        the chunk indices needed; returns {(file_name, chunk_index): text}.
+        """
+        wanted = {f: sorted(set(idx)) for f, idx in wanted.items() if idx}
+        if not wanted:
+            return {}
+
+        expr = " or ".join(
+            f"({_file_expr(f)} and chunk_index in {list(idx)})"
+            for f, idx in wanted.items()
+        )
+
+        try:
+            rows = self.collection.query(
+                expr=expr,
+                output_fields=["file_name", "chunk_index", "text"],
+                limit=sum(len(idx) for idx in wanted.values())
+            )
+            return {(r["file_name"], r["chunk_index"]): r["text"] for r in rows}
+
+        except Exception as e:
+            print(f"✗ Error fetching neighbour chunks: {e}")
+            return {}
+
+    def delete_file(self, file_name, compact=True):
+        """Bulk-delete every chunk of a file with a single expression delete."""
+        try:
+            result = self.collection.delete(expr=_file_expr(file_name))
+            self.collection.flush()
+
+            if compact:
+                self.compact()
+
+            print(f"✓ Deleted {result.delete_count} chunks for {file_name}")
+            return True
+
+        except Exception as e:
+            print(f"✗ Error deleting {file_name}: {e}")
+            return False
+
+    def delete_ids(self, ids, compact=True, batch_size=1000):
+        """Delete rows by primary key in batches of `id in [...]` expressions."""
+        try:
+            ids = list(ids)
+            for start in range(0, len(ids), batch_size):
+                batch = ids[start:start + batch_size]
+                self.collection.delete(expr=f"id in {_quote_list(batch)}")
+            self.collection.flush()
+
+            if compact:
+                self.compact()
+
+            return True
+
+        except Exception as e:
+            print(f"✗ Error deleting rows: {e}")
+            return False
+
+    def compact(self):
+        """Trigger compaction so deleted rows stop costing search time and storage."""
+        try:
+            self.collection.compact()
+            print("✓ Compaction triggered")
+        except Exception as e:
+            # Serverless clusters compact on their own and may reject manual requests
+            print(f"ℹ️ Compaction skipped: {e}")
+
+    def has_file(self, file_name):
+        try:
+            return bool(self.collection.query(expr=_file_expr(file_name), output_fields=["id"], limit=1))
+        except Exception:
+            return False
+
     def get_all_embedded_files(self):
         try:
-            results = self.collection.query(expr="file_name != ''", output_fields=["file_name"])
-            return {r["file_name"] for r in results}
+            files = set()
+            for batch in self.iter_batches(output_fields=("file_name",), batch_size=5000):
+                files.update(r["file_name"] for r in batch)
+            return files
         except:
             return set()
 
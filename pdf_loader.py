@@ -1,22 +1,298 @@
 import PyPDF2
+import multiprocessing
 import re
+from collections import Counter
 
-def get_pdf_text(pdf_path):
+import config
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+try:
+    import pypdfium2
+except ImportError:
+    pypdfium2 = None
+
+
+# -------------------------------------------------------------
+# TEXT EXTRACTION BACKENDS
+# -------------------------------------------------------------
+# Each backend opens a document once and extracts pages one at a
+# time, so a single bad page can be timed out or skipped on its own.
+# -------------------------------------------------------------
+class PyPDF2Backend:
+    name = "pypdf2"
+    available = True
+
+    def open(self, path):
+        return PyPDF2.PdfReader(path)
+
+    def page_count(self, doc):
+        return len(doc.pages)
+
+    def page_text(self, doc, index):
+        return doc.pages[index].extract_text()
+
+    def close(self, doc):
+        pass
+
+
+class PyMuPDFBackend:
+    name = "pymupdf"
+    available = fitz is not None
+
+    def open(self, path):
+        return fitz.open(path)
+
+    def page_count(self, doc):
+        return doc.page_count
+
+    def page_text(self, doc, index):
+        return doc.load_page(index).get_text()
+
+    def close(self, doc):
+        doc.close()
+
+
+class PdfiumBackend:
+    name = "pypdfium2"
+    available = pypdfium2 is not None
+
+    def open(self, path):
+        return pypdfium2.PdfDocument(path)
+
+    def page_count(self, doc):
+        return len(doc)
+
+    def page_text(self, doc, index):
+        page = doc[index]
+        textpage = page.get_textpage()
+        try:
+            return textpage.get_text_range()
+        finally:
+            textpage.close()
+            page.close()
+
+    def close(self, doc):
+        doc.close()
+
+
+# Preference order for "auto": fastest available first
+BACKENDS = {b.name: b for b in (PyMuPDFBackend(), PdfiumBackend(), PyPDF2Backend())}
+
+
+def available_backends():
+    return [name for name, backend in BACKENDS.items() if backend.available]
+
+
+def get_backend(name=None):
+    name = (name or config.PDF_EXTRACT_BACKEND).lower()
+
+    if name == "auto":
+        return BACKENDS[available_backends()[0]]
+
+    backend = BACKENDS.get(name)
+    if backend is None or not backend.available:
+        print(f"⚠️ PDF backend '{name}' unavailable, using {PyPDF2Backend.name}")
+        return BACKENDS[PyPDF2Backend.name]
+    return backend
+
+
+# Pages are extracted in a spawned child process: PyMuPDF and pdfium are not
+# thread-safe, and a process stuck in native code can only be stopped by
+# killing it. The child re-imports the parent's __main__ (main.py when run
+# directly), so main.py skips app initialisation in child processes.
+_MP = multiprocessing.get_context("spawn")
+
+
+def _page_worker_main(conn, backend_name, pdf_path):
+    """Child process loop: open the document once, then extract pages on request."""
+    backend = BACKENDS[backend_name]
+    try:
+        doc = backend.open(pdf_path)
+        conn.send(("ready", backend.page_count(doc)))
+    except Exception as e:
+        conn.send(("error", str(e)))
+        return
+
+    while True:
+        index = conn.recv()
+        if index is None:
+            break
+        try:
+            conn.send(("ok", backend.page_text(doc, index) or ""))
+        except Exception as e:
+            conn.send(("error", str(e)))
+
+    backend.close(doc)
+
+
+class _PageWorker:
+    """Parent-side handle on a page-extraction child process."""
+
+    def __init__(self, backend_name, pdf_path, timeout, start_timeout=None):
+        self.timeout = timeout
+        self.conn, child_conn = _MP.Pipe()
+        self.process = _MP.Process(
+            target=_page_worker_main,
+            args=(child_conn, backend_name, pdf_path),
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+        # Starting the interpreter and re-importing __main__ can take far
+        # longer than one page, so the handshake has its own limit
+        status, value = self._receive(start_timeout or config.PDF_WORKER_START_TIMEOUT)
+        if status != "ready":
+            self.kill()
+            raise RuntimeError(value)
+        self.page_count = value
+
+    def _receive(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        if not self.conn.poll(timeout):
+            self.kill()
+            raise TimeoutError(f"timed out after {timeout}s")
+        try:
+            return self.conn.recv()
+        except EOFError:
+            # The child died, e.g. a native crash inside the PDF library
+            self.kill()
+            raise RuntimeError(f"extraction process exited with code {self.process.exitcode}")
+
+    def page_text(self, index):
+        self.conn.send(index)
+        status, value = self._receive()
+        if status != "ok":
+            raise RuntimeError(value)
+        return value
+
+    @property
+    def alive(self):
+        return self.process.is_alive()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def close(self):
+        try:
+            self.conn.send(None)
+            self.process.join(5)
+        except Exception:
+            pass
+        self.kill()
+
+
+def _extract_in_process(backend, pdf_path):
+    """Page-by-page extraction in the calling process, with no timeout."""
+    try:
+        doc = backend.open(pdf_path)
+        count = backend.page_count(doc)
+    except Exception as e:
+        print(f"Error reading PDF: {e}")
+        return None, 0
+
+    pages = []
+    skipped = 0
+    for index in range(count):
+        try:
+            pages.append(backend.page_text(doc, index) or "")
+        except Exception as e:
+            print(f"⚠️ Skipped page {index + 1} of {pdf_path}: {e}")
+            pages.append("")
+            skipped += 1
+
+    backend.close(doc)
+    return pages, skipped
+
+
+def _extract_with_timeout(backend, pdf_path, timeout):
     """
-    Extract text from a PDF file.
-    Returns the full text as a single string.
+    Page-by-page extraction in a child process. A page that times out or
+    crashes the child is skipped, and a fresh child resumes at the next page.
     """
     try:
-        with open(pdf_path, "rb") as f:
-            reader = PyPDF2.PdfReader(f)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-        return text.strip() if text else None
+        worker = _PageWorker(backend.name, pdf_path, timeout)
     except Exception as e:
         print(f"Error reading PDF: {e}")
+        return None, 0
+
+    count = worker.page_count
+    pages = []
+    skipped = 0
+    try:
+        for index in range(count):
+            try:
+                pages.append(worker.page_text(index))
+            except Exception as e:
+                print(f"⚠️ Skipped page {index + 1} of {pdf_path}: {e}")
+                pages.append("")
+                skipped += 1
+
+                if not worker.alive:
+                    try:
+                        worker = _PageWorker(backend.name, pdf_path, timeout)
+                    except Exception as e:
+                        print(f"✗ Could not restart extraction for {pdf_path}: {e}")
+                        pages.extend([""] * (count - index - 1))
+                        skipped += count - index - 1
+                        break
+    finally:
+        worker.close()
+
+    return pages, skipped
+
+
+def extract_pdf_pages(pdf_path, backend=None, timeout=None):
+    """
+    Extract text from a PDF file page by page.
+    Returns a list with one string per page, or None if the file can't be read.
+    Pages that fail or exceed the per-page timeout come back as empty strings.
+    A timeout of 0 extracts in-process, without any time limit.
+    """
+    backend = get_backend(backend)
+    timeout = config.PDF_PAGE_TIMEOUT if timeout is None else timeout
+
+    if timeout:
+        pages, skipped = _extract_with_timeout(backend, pdf_path, timeout)
+    else:
+        pages, skipped = _extract_in_process(backend, pdf_path)
+
+    if skipped:
+        print(f"ℹ️ {pdf_path}: {skipped}/{len(pages)} pages skipped ({backend.name})")
+    return pages
+
+
+def get_pdf_text(pdf_path, pages=None):
+    """
+    Extract text from a PDF file.
+    Returns the full text as a single string.
+    """
+    if pages is None:
+        pages = extract_pdf_pages(pdf_path)
+    if not pages:
         return None
 
+    text = "\n".join(pages)
+    return text.strip() or None
+
+
+def validate_chunk_settings(chunk_size, overlap):
+    """Raise ValueError unless 0 <= overlap < chunk_size, both integers."""
+    for name, value in (("chunk_size", chunk_size), ("overlap", overlap)):
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise ValueError(f"{name} must be an integer")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+    if not 0 <= overlap < chunk_size:
+        raise ValueError("overlap must satisfy 0 <= overlap < chunk_size")
+
 
 def split_text_into_chunks(text, chunk_size=500, overlap=50):
     """
@@ -24,6 +300,8 @@ def split_text_into_chunks(text, chunk_size=500, overlap=50):
     with optional overlap between chunks.
     Returns a list of strings.
     """
+    validate_chunk_settings(chunk_size, overlap)
+
     if not text:
         return []
 
@@ -38,4 +316,82 @@ def split_text_into_chunks(text, chunk_size=500, overlap=50):
         chunks.append(chunk.strip())
         start += chunk_size - overlap  # Move start point with overlap
 
-    return chunks
\ No newline at end of file
+    return chunks
+
+
+# Below this overlap, stripped chunks no longer say whether a space sat on
+# the boundary, so stitching can add or drop a space there
+MIN_EXACT_OVERLAP = 2
+
+
+def _shared_size(text, chunk, overlap):
+    """Length of the overlap between `text` and the next chunk, or 0 when none matches."""
+    for size in sorted({overlap, overlap - 1, overlap - 2, len(chunk)}, reverse=True):
+        if 1 <= size <= min(overlap, len(chunk)) and text.endswith(chunk[:size]):
+            return size
+    return 0
+
+
+def stitch_chunks(chunks, overlap):
+    """
+    Rebuild the normalised document text from its ordered chunks, given the
+    overlap they were split with. Stripping can shorten the shared span by
+    one character at either end, so only overlaps of `overlap`, `overlap - 1`
+    and `overlap - 2` characters are considered (plus a short final chunk
+    lying entirely inside the previous one). Exact for
+    overlap >= MIN_EXACT_OVERLAP.
+    """
+    text = ""
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if not text:
+            text = chunk
+            continue
+
+        shared = _shared_size(text, chunk, overlap)
+        text += chunk[shared:] if shared else " " + chunk
+
+    return text
+
+
+
+# Leading chunks examined when inferring the overlap of stored chunks
+INFER_SAMPLE_CHUNKS = 50
+
+
+def overlap_fits(chunks, overlap):
+    """True when every adjacent pair of chunks joins at `overlap` as stitch_chunks would."""
+    return all(
+        _shared_size(prev, chunk, overlap)
+        for prev, chunk in zip(chunks, chunks[1:])
+        if prev and chunk
+    )
+
+
+def infer_overlap(chunks):
+    """
+    Recover the overlap ordered chunks were split with from their leading
+    INFER_SAMPLE_CHUNKS: the smallest overlap every adjacent pair joins at.
+    When stripping shortened every sampled pair this can be up to two below
+    the real overlap, but it still stitches those chunks back exactly. Falls
+    back to the most common shared-prefix length, and returns None for fewer
+    than two chunks. Only reliable for overlaps of at least MIN_EXACT_OVERLAP.
+    """
+    chunks = [c for c in chunks[:INFER_SAMPLE_CHUNKS] if c]
+
+    sizes = []
+    for prev, chunk in zip(chunks, chunks[1:]):
+        size = min(len(prev), len(chunk))
+        while size and not prev.endswith(chunk[:size]):
+            size -= 1
+        sizes.append(size)
+
+    if not sizes:
+        return None
+
+    # Stripping can shorten a pair's shared span by up to two characters
+    for overlap in sorted({size + d for size in sizes if size for d in range(3)}):
+        if overlap_fits(chunks, overlap):
+            return overlap
+    return Counter(sizes).most_common(1)[0][0]
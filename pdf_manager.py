@@ -1,23 +1,109 @@
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import config
-from pdf_loader import get_pdf_text, split_text_into_chunks
+from embedding_cache import EmbeddingCache
+from pdf_loader import (
+    MIN_EXACT_OVERLAP,
+    extract_pdf_pages,
+    get_pdf_text,
+    infer_overlap,
+    overlap_fits,
+    split_text_into_chunks,
+    stitch_chunks,
+    validate_chunk_settings,
+)
 
 class PDFManager:
     """Lightweight PDF handler — uses shared embedder & Milvus."""
 
-    def __init__(self, embedding_manager, milvus_manager):
+    def __init__(self, embedding_manager, milvus_manager, stats=None, summaries=None):
         self.embedding = embedding_manager
         self.milvus = milvus_manager
+        self.stats = stats
+        self.summaries = summaries
         self.pdf_folder = config.PDF_REFERENCE_FOLDER
+        self.cache = None
+
+        # Re-chunk jobs run one at a time, off the request path
+        self._rechunk_worker = ThreadPoolExecutor(max_workers=1)
+        self._rechunk_lock = threading.Lock()
+        self.rechunk_status = {"state": "idle"}
 
         os.makedirs(self.pdf_folder, exist_ok=True)
 
+        if config.EMBEDDING_CACHE_ENABLED:
+            self.cache = EmbeddingCache()
+            if config.EMBEDDING_CACHE_EVICT_STALE:
+                self.cache.evict_stale_models()
+
     def get_pdf_files(self):
         return [
             f for f in os.listdir(self.pdf_folder)
             if f.lower().endswith(".pdf")
         ]
 
+    def _embed_chunks(self, chunks):
+        """
+        Embed all chunks of a document in one batched encode call, serving
+        any chunk already in the on-disk cache without touching the model.
+        """
+        if not chunks:
+            return []
+
+        if self.cache is None:
+            embeddings = self.embedding.embed_multiple(chunks)
+            return None if embeddings is None else list(embeddings)
+
+        embeddings = self.cache.get_many(chunks)
+        missing = [c for c, e in zip(chunks, embeddings) if e is None]
+
+        if missing:
+            fresh = self.embedding.embed_multiple(missing)
+            if fresh is None:
+                return None
+            self.cache.put_many(missing, fresh)
+
+            fresh_by_text = dict(zip(missing, fresh))
+            embeddings = [e if e is not None else fresh_by_text[c] for c, e in zip(chunks, embeddings)]
+
+        print(f"ℹ️ Embedding cache: {len(chunks) - len(missing)}/{len(chunks)} hits")
+        return embeddings
+
+    def _ingest(self, name, path):
+        pages = extract_pdf_pages(path)
+        text = get_pdf_text(path, pages=pages)
+        if not text:
+            print("✗ Failed loading:", name)
+            return False
+
+        chunks = split_text_into_chunks(
+            text,
+            chunk_size=config.CHUNK_SIZE,
+            overlap=config.CHUNK_OVERLAP
+        )
+
+        embeddings = self._embed_chunks(chunks)
+        if embeddings is None:
+            return False
+
+        if not self.milvus.add_embeddings(name, chunks, embeddings):
+            return False
+
+        if self.stats is not None:
+            self.stats.record_book(
+                name, len(chunks), pages=len(pages), size=os.path.getsize(path),
+                chunk_size=config.CHUNK_SIZE, overlap=config.CHUNK_OVERLAP
+            )
+        return True
+
+    def _schedule_summaries(self, name):
+        # Only once the book's stored chunks are final, never mid-replace
+        if self.summaries is not None:
+            self.summaries.schedule([name])
+
     def process_new_pdfs(self):
         pdfs = self.get_pdf_files()
         embedded = self.milvus.get_all_embedded_files()
@@ -37,21 +123,10 @@ class PDFManager:
             print(f"🔄 Processing {pdf_file}")
             full_path = os.path.join(self.pdf_folder, pdf_file)
 
-            text = get_pdf_text(full_path)
-            if not text:
-                print(f"✗ Could not read {pdf_file}")
-                continue
-
-            chunks = split_text_into_chunks(
-                text,
-                chunk_size=config.CHUNK_SIZE,
-                overlap=config.CHUNK_OVERLAP
-            )
-
-            embeddings = [self.embedding.embed_text(c) for c in chunks]
-            success = self.milvus.add_embeddings(pdf_file, chunks, embeddings)
+            success = self._ingest(pdf_file, full_path)
 
             if success:
+                self._schedule_summaries(pdf_file)
                 processed += 1
                 print(f"✓ Done: {pdf_file}")
             else:
@@ -60,29 +135,212 @@ class PDFManager:
         print(f"\n📊 Summary: processed={processed}, skipped={skipped}")
         return processed, skipped
 
-    def add_pdf_manually(self, path):
+    def add_pdf_manually(self, path, replace=False):
         if not os.path.exists(path):
             print("✗ File not found:", path)
             return False
 
         name = os.path.basename(path)
 
-        if name in self.milvus.get_all_embedded_files():
-            print("✓ Already embedded:", name)
-            return True
+        if self.milvus.has_file(name):
+            if not replace:
+                print("✓ Already embedded:", name)
+                return True
+            return self.replace_pdf(path)
 
         print("🔄 Manually processing:", name)
+        if not self._ingest(name, path):
+            return False
+
+        self._schedule_summaries(name)
+        return True
+
+    def delete_pdf(self, name, remove_file=True):
+        """Remove a book's chunks (and optionally its PDF so startup won't re-add it)."""
+        name = os.path.basename(name)
+
+        if not self.milvus.delete_file(name):
+            return False
+
+        if self.stats is not None:
+            self.stats.remove_book(name)
+        if self.summaries is not None:
+            self.summaries.remove_book(name)
+
+        path = os.path.join(self.pdf_folder, name)
+        if remove_file and os.path.exists(path):
+            os.remove(path)
+            print("🗑️ Removed file:", path)
+
+        return True
+
+    def replace_pdf(self, path):
+        """
+        Re-embed a corrected PDF under the same name. New rows are inserted
+        before the old ones are deleted so the book never disappears from search.
+        """
+        if not os.path.exists(path):
+            print("✗ File not found:", path)
+            return False
 
-        text = get_pdf_text(path)
+        name = os.path.basename(path)
+        old_ids = [r["id"] for r in self.milvus.get_file_chunks(name, output_fields=())]
+
+        print("🔄 Replacing:", name)
+        if not self._ingest(name, path):
+            return False
+
+        if old_ids and not self.milvus.delete_ids(old_ids):
+            return False
+
+        # The old chunks are gone only now; bump the library version again
+        if self.stats is not None:
+            self.stats.touch()
+        self._schedule_summaries(name)
+        return True
+
+    def chunk_settings(self, name):
+        """The (chunk_size, overlap) a stored book was split with."""
+        if self.stats is not None:
+            return self.stats.chunk_settings(name)
+        return config.CHUNK_SIZE, config.CHUNK_OVERLAP
+
+    def _stored_text(self, name, rows):
+        """
+        Rebuild a book's text from its stored chunks using the overlap it was
+        split with. Below MIN_EXACT_OVERLAP that can't be done exactly, so
+        the PDF is re-read instead when it is still on disk.
+        """
+        _, old_overlap = self.chunk_settings(name)
+        if old_overlap >= MIN_EXACT_OVERLAP:
+            return stitch_chunks([r["text"] for r in rows], old_overlap)
+
+        path = os.path.join(self.pdf_folder, name)
+        if os.path.exists(path):
+            return get_pdf_text(path)
+
+        print(f"⚠️ {name} was split with overlap {old_overlap} and its PDF is gone; "
+              "chunk-boundary spacing may differ")
+        return stitch_chunks([r["text"] for r in rows], old_overlap)
+
+    def _overlap_matches(self, name, rows):
+        """
+        Check the recorded overlap against the stored chunks; stitching with
+        the wrong one silently duplicates or drops boundary text.
+        """
+        _, recorded = self.chunk_settings(name)
+        texts = [r["text"] for r in rows]
+
+        if recorded >= MIN_EXACT_OVERLAP and overlap_fits(texts, recorded):
+            return True
+
+        # Small recorded overlaps are rebuilt from the PDF and can't be
+        # verified exactly; only refuse when the chunks clearly overlap more
+        inferred = infer_overlap(texts)
+        if recorded < MIN_EXACT_OVERLAP and (inferred is None or inferred < MIN_EXACT_OVERLAP):
+            return True
+
+        print(f"✗ {name}: stored chunks look split with overlap {inferred}, "
+              f"but overlap {recorded} is recorded; not re-chunking")
+        return False
+
+    def rechunk_pdf(self, name, chunk_size=None, overlap=None, compact=True):
+        """
+        Re-split a stored book with new chunk settings. The text is rebuilt
+        from the stored chunks and unchanged chunks keep their stored vectors,
+        so only genuinely new chunk text goes through the embedding model.
+        """
+        chunk_size = config.CHUNK_SIZE if chunk_size is None else chunk_size
+        overlap = config.CHUNK_OVERLAP if overlap is None else overlap
+        validate_chunk_settings(chunk_size, overlap)
+
+        rows = self.milvus.get_file_chunks(name)
+        if not rows:
+            print("✗ Nothing stored for:", name)
+            return False
+
+        if not self._overlap_matches(name, rows):
+            return False
+
+        text = self._stored_text(name, rows)
         if not text:
-            print("✗ Failed loading:", name)
+            print("✗ Could not rebuild text for:", name)
             return False
 
-        chunks = split_text_into_chunks(
-            text,
-            chunk_size=config.CHUNK_SIZE,
-            overlap=config.CHUNK_OVERLAP
+        chunks = split_text_into_chunks(text, chunk_size=chunk_size, overlap=overlap)
+
+        stored = {r["text"]: r["embedding"] for r in rows}
+        missing = [c for c in dict.fromkeys(chunks) if c not in stored]
+
+        fresh = self._embed_chunks(missing)
+        if fresh is None:
+            return False
+        stored.update(zip(missing, fresh))
+
+        print(f"🔄 Re-chunking {name}: {len(chunks)} chunks, {len(missing)} re-embedded")
+
+        embeddings = [stored[c] for c in chunks]
+        if not self.milvus.add_embeddings(name, chunks, embeddings):
+            return False
+
+        if not self.milvus.delete_ids([r["id"] for r in rows], compact=compact):
+            return False
+
+        # Recorded once the old chunks are gone, which also bumps the library version
+        if self.stats is not None:
+            self.stats.update_chunks(name, len(chunks), chunk_size, overlap)
+        return True
+
+    def rechunk_all(self, chunk_size=None, overlap=None, names=None):
+        """Re-chunk some books (all when `names` is None), updating rechunk_status as it goes."""
+        validate_chunk_settings(
+            config.CHUNK_SIZE if chunk_size is None else chunk_size,
+            config.CHUNK_OVERLAP if overlap is None else overlap
         )
 
-        embeddings = [self.embedding.embed_text(c) for c in chunks]
-        return self.milvus.add_embeddings(name, chunks, embeddings)
+        names = sorted(names if names is not None else self.milvus.get_all_embedded_files())
+        status = self.rechunk_status
+        status.update(state="running", total=len(names), done=0, failed=0)
+
+        for name in names:
+            status["current"] = name
+            try:
+                ok = self.rechunk_pdf(name, chunk_size=chunk_size, overlap=overlap, compact=False)
+            except Exception as e:
+                print(f"✗ Re-chunk error for {name}: {e}")
+                ok = False
+            status["done" if ok else "failed"] += 1
+
+        # One compaction for the whole pass instead of one per book
+        self.milvus.compact()
+
+        status.update(state="finished", current=None, finished_at=time.time())
+        print(f"\n📊 Re-chunk summary: done={status['done']}, failed={status['failed']}")
+        return status["done"], status["failed"]
+
+    def schedule_rechunk(self, names=None, chunk_size=None, overlap=None):
+        """
+        Queue a background re-chunk of some books (all when `names` is None).
+        Returns False if a re-chunk is already queued or running; progress
+        is reported in `rechunk_status`.
+        """
+        with self._rechunk_lock:
+            if self.rechunk_status["state"] in ("queued", "running"):
+                return False
+            self.rechunk_status = {
+                "state": "queued",
+                "scope": names or "all",
+                "chunk_size": config.CHUNK_SIZE if chunk_size is None else chunk_size,
+                "overlap": config.CHUNK_OVERLAP if overlap is None else overlap,
+                "started_at": time.time(),
+            }
+
+        def run():
+            try:
+                self.rechunk_all(chunk_size=chunk_size, overlap=overlap, names=names)
+            except Exception as e:
+                print(f"✗ Re-chunk failed: {e}")
+                self.rechunk_status.update(state="failed", error=str(e), finished_at=time.time())
+
+        self._rechunk_worker.submit(run)
+        return True
@@ -0,0 +1,163 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+import numpy as np
+import config
+import context_builder
+
+
+class Session:
+    """
+    Recent turns of one conversation. Each turn keeps the exact prompt and
+    answer exchanged with the LLM, which are replayed as chat messages, and
+    the chunk keys whose text that prompt carried.
+    """
+
+    def __init__(self, session_id):
+        self.id = session_id
+        self.turns = deque(maxlen=config.SESSION_MAX_TURNS)
+        self.last_access = time.time()
+
+        # (file_name, chunk_index) -> text, oldest first; a fetch cache for
+        # neighbour expansion only, not a record of what the LLM has seen
+        self.chunks = OrderedDict()
+
+        # Library version the cached chunks and turn keys belong to
+        self.library_version = None
+
+    def combined_embedding(self, embedding):
+        """
+        Blend the current query embedding with recent ones using
+        geometrically decaying weights, so follow-ups like "what about
+        chapter 3?" still search near the topic of the conversation.
+        """
+        vectors = [np.asarray(embedding, dtype=np.float32)]
+        weights = [1.0]
+
+        weight = 1.0
+        for turn in reversed(self.turns):
+            weight *= config.SESSION_QUERY_DECAY
+            vectors.append(turn["embedding"])
+            weights.append(weight)
+
+        if len(vectors) == 1:
+            return vectors[0]
+        return np.average(np.stack(vectors), axis=0, weights=weights)
+
+    def sync_library(self, version):
+        """
+        Drop cached chunk text and sent-chunk keys once the library changes:
+        after a replace, re-chunk or delete the same (file_name, chunk_index)
+        can hold different text, or nothing at all.
+        """
+        if version == self.library_version:
+            return
+        if self.library_version is not None:
+            self.chunks.clear()
+            for turn in self.turns:
+                turn["keys"] = frozenset()
+        self.library_version = version
+
+    def remember_chunks(self, texts):
+        for key, text in texts.items():
+            self.chunks[key] = text
+            self.chunks.move_to_end(key)
+
+        while len(self.chunks) > config.SESSION_MAX_CHUNKS:
+            self.chunks.popitem(last=False)
+
+    def add_turn(self, question, prompt, answer, embedding, keys=()):
+        self.turns.append({
+            "question": question,
+            "prompt": prompt,
+            "answer": answer,
+            "embedding": np.asarray(embedding, dtype=np.float32),
+            "keys": frozenset(keys),
+        })
+
+    def sent_keys(self):
+        """Chunks carried in full by a prompt that is still in the replayed history."""
+        return set().union(*(t["keys"] for t in self.turns))
+
+    def history(self, token_budget=None):
+        """
+        The retained turns as chat messages, oldest first, and the chunk keys
+        carried by the prompts replayed in full. Within `token_budget` the
+        newest turns are kept whole; older ones lose their context block
+        first and are dropped once even that doesn't fit.
+        """
+        budget = token_budget
+        replayed = []
+        keys = set()
+        stripped = False
+
+        for t in reversed(self.turns):
+            prompt = t["prompt"]
+            size = context_builder.estimate_tokens(prompt, t["answer"])
+            if budget is not None and (stripped or size > budget):
+                stripped = True
+                prompt = context_builder.build_prompt("", t["question"])
+                size = context_builder.estimate_tokens(prompt, t["answer"])
+                if size > budget:
+                    break
+            else:
+                keys |= t["keys"]
+
+            replayed.append((prompt, t["answer"]))
+            if budget is not None:
+                budget -= size
+
+        messages = []
+        for prompt, answer in reversed(replayed):
+            messages.append({"role": "user", "content": prompt})
+            messages.append({"role": "assistant", "content": answer})
+        return messages, keys
+
+
+class SessionStore:
+    """Bounded, TTL-evicted in-memory store of chat sessions."""
+
+    def __init__(self, max_sessions=None, ttl=None):
+        self.max_sessions = max_sessions or config.SESSION_MAX_SESSIONS
+        self.ttl = ttl or config.SESSION_TTL_SECONDS
+
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, now):
+        # Sessions are kept in last-access order, so expired ones are at the front
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.last_access <= self.ttl and len(self._sessions) <= self.max_sessions:
+                break
+            self._sessions.popitem(last=False)
+
+    def create(self):
+        with self._lock:
+            session = Session(uuid.uuid4().hex)
+            self._sessions[session.id] = session
+            self._evict(time.time())
+            return session
+
+    def get(self, session_id):
+        with self._lock:
+            now = time.time()
+            self._evict(now)
+
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_access = now
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def get_or_create(self, session_id):
+        return (session_id and self.get(session_id)) or self.create()
+
+    def delete(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def __len__(self):
+        return len(self._sessions)
@@ -0,0 +1,161 @@
+"""
+Collection snapshot export/import.
+
+Streams every row of a Milvus collection into a Parquet file (one row group
+per query-iterator batch) and bulk-loads such a file into another collection,
+so a library can be moved between clusters without re-embedding any PDFs.
+
+Usage:
+    python snapshot.py export library.parquet [--collection documents]
+    python snapshot.py import library.parquet --collection documents_copy [--append]
+"""
+import argparse
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import config
+from milvus_manager import MilvusManager
+
+
+def _schema(dimension, metadata=None):
+    return pa.schema(
+        [
+            pa.field("id", pa.string()),
+            pa.field("file_name", pa.string()),
+            pa.field("chunk_index", pa.int64()),
+            pa.field("text", pa.string()),
+            pa.field("embedding", pa.list_(pa.float32(), dimension)),
+        ],
+        metadata=metadata,
+    )
+
+
+def export_snapshot(milvus, path, batch_size=2000):
+    """Write all rows of `milvus.collection` to `path`. Returns the row count."""
+    dimension = config.EMBEDDING_DIMENSION
+    schema = _schema(dimension, {
+        "collection": milvus.collection_name,
+        "embedding_model": config.EMBEDDING_MODEL,
+        "dimension": str(dimension),
+        "created_at": str(int(time.time())),
+    })
+
+    # Text compresses well; raw float32 vectors barely do, so store them as-is
+    writer = pq.ParquetWriter(
+        path,
+        schema,
+        compression={
+            "id": "zstd",
+            "file_name": "zstd",
+            "chunk_index": "zstd",
+            "text": "zstd",
+            "embedding": "none",
+        },
+        use_dictionary=["file_name"],
+    )
+
+    expected = milvus.count_rows()
+
+    total = 0
+    start = time.time()
+    try:
+        for batch in milvus.iter_batches(batch_size=batch_size):
+            vectors = np.asarray([r["embedding"] for r in batch], dtype=np.float32).reshape(-1)
+
+            table = pa.Table.from_arrays(
+                [
+                    pa.array([r["id"] for r in batch], pa.string()),
+                    pa.array([r["file_name"] for r in batch], pa.string()),
+                    pa.array([r["chunk_index"] for r in batch], pa.int64()),
+                    pa.array([r["text"] for r in batch], pa.string()),
+                    pa.FixedSizeListArray.from_arrays(pa.array(vectors), dimension),
+                ],
+                schema=schema,
+            )
+            writer.write_table(table)
+
+            total += len(batch)
+            print(f"📤 Exported {total} rows")
+    finally:
+        writer.close()
+
+    if total != expected:
+        raise RuntimeError(
+            f"Exported {total} rows but {milvus.collection_name} holds {expected}; "
+            f"{path} is incomplete (was the collection written to during export?)"
+        )
+
+    print(f"✓ Exported {total} rows to {path} in {time.time() - start:.1f}s")
+    return total
+
+
+def import_snapshot(path, milvus, batch_size=2000, append=False):
+    """Bulk-load a snapshot into `milvus.collection` with one flush at the end."""
+    parquet = pq.ParquetFile(path)
+    metadata = parquet.schema_arrow.metadata or {}
+
+    dimension = int(metadata.get(b"dimension", config.EMBEDDING_DIMENSION))
+    if dimension != config.EMBEDDING_DIMENSION:
+        raise ValueError(
+            f"Snapshot dimension {dimension} does not match EMBEDDING_DIMENSION={config.EMBEDDING_DIMENSION}"
+        )
+
+    if not append and milvus.collection.num_entities > 0:
+        raise ValueError(
+            f"Collection {milvus.collection_name} is not empty; pass append=True to load into it anyway"
+        )
+
+    total = 0
+    start = time.time()
+    for batch in parquet.iter_batches(batch_size=batch_size):
+        vectors = batch.column("embedding").flatten().to_numpy(zero_copy_only=False)
+
+        milvus.insert_rows(
+            batch.column("id").to_pylist(),
+            batch.column("file_name").to_pylist(),
+            batch.column("chunk_index").to_pylist(),
+            batch.column("text").to_pylist(),
+            vectors.reshape(-1, dimension).tolist(),
+        )
+
+        total += batch.num_rows
+        print(f"📥 Imported {total}/{parquet.metadata.num_rows} rows")
+
+    milvus.flush()
+
+    print(f"✓ Imported {total} rows into {milvus.collection_name} in {time.time() - start:.1f}s")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or import a Milvus collection snapshot")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export_cmd = sub.add_parser("export", help="Stream a collection into a Parquet snapshot")
+    export_cmd.add_argument("path")
+    export_cmd.add_argument("--collection", default=config.MILVUS_COLLECTION_NAME)
+    export_cmd.add_argument("--batch-size", type=int, default=2000)
+
+    import_cmd = sub.add_parser("import", help="Bulk-load a Parquet snapshot into a collection")
+    import_cmd.add_argument("path")
+    import_cmd.add_argument("--collection", required=True)
+    import_cmd.add_argument("--batch-size", type=int, default=2000)
+    import_cmd.add_argument("--append", action="store_true", help="Allow loading into a non-empty collection")
+
+    args = parser.parse_args()
+    milvus = MilvusManager(collection_name=args.collection)
+
+    try:
+        if args.command == "export":
+            export_snapshot(milvus, args.path, batch_size=args.batch_size)
+        else:
+            import_snapshot(args.path, milvus, batch_size=args.batch_size, append=args.append)
+    finally:
+        milvus.close_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,12 @@ const API_BASE_URL = window.location.origin;
 // Chat history storage
 let chatMessages = [];
 
+// Server-side chat session (recent turns + already retrieved chunks)
+let sessionId = '';
+
+// Last /status payload and its ETag, revalidated with If-None-Match
+let statusCache = { etag: null, data: null };
+
 // ==================== INITIALIZATION ====================
 document.addEventListener('DOMContentLoaded', function() {
     initializeTabs();
@@ -91,7 +97,7 @@ async function sendMessage() {
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify({ query: query }),
+            body: JSON.stringify({ query: query, session_id: sessionId }),
             timeout: 30000
         });
         
@@ -100,6 +106,7 @@ async function sendMessage() {
         
         if (response.ok) {
             const data = await response.json();
+            sessionId = data.session_id || sessionId;
             const answer = data.answer || 'No response generated.';
             const fileNames = data.file_names || [];
             const numResults = data.num_results || 0;
@@ -204,19 +211,19 @@ async function loadBooks() {
     booksList.innerHTML = '';
     
     try {
-        const response = await fetch(`${API_BASE_URL}/status`, {
-            timeout: 10000
-        });
+        const data = await fetchStatus(10000);
         
-        if (response.ok) {
-            const data = await response.json();
+        if (data) {
             const embeddedFiles = data.embedded_files || [];
             const totalFiles = data.total_files || 0;
+            const books = data.books || {};
             
             // Update statistics
             document.getElementById('total-books').textContent = totalFiles;
             document.getElementById('status').textContent = 'Running';
-            document.getElementById('last-updated').textContent = 'Now';
+            document.getElementById('last-updated').textContent = data.updated_at
+                ? new Date(data.updated_at * 1000).toLocaleTimeString()
+                : '—';
             
             // Display books
             if (embeddedFiles.length > 0) {
@@ -230,9 +237,14 @@ async function loadBooks() {
                     bookName.className = 'book-name';
                     bookName.textContent = `${index + 1}. ${fileName}`;
                     
+                    const book = books[fileName] || {};
+                    const details = [];
+                    if (book.chunks) details.push(`${book.chunks} chunks`);
+                    if (book.pages) details.push(`${book.pages} pages`);
+                    
                     const bookStatus = document.createElement('div');
                     bookStatus.className = 'book-status';
-                    bookStatus.textContent = '✓ Embedded';
+                    bookStatus.textContent = `✓ ${details.join(' · ') || 'Embedded'}`;
                     
                     bookItem.appendChild(bookName);
                     bookItem.appendChild(bookStatus);
@@ -366,11 +378,9 @@ async function checkAPIStatus() {
     const statusText = document.getElementById('api-status-text');
     
     try {
-        const response = await fetch(`${API_BASE_URL}/status`, {
-            timeout: 5000
-        });
+        const data = await fetchStatus(5000);
         
-        if (response.ok) {
+        if (data) {
             statusIndicator.classList.add('connected');
             statusIndicator.classList.remove('error');
             statusText.textContent = '✅ Backend Connected';
@@ -387,6 +397,31 @@ async function checkAPIStatus() {
 }
 
 // ==================== UTILITY FUNCTIONS ====================
+// Conditional GET of /status: a 304 reuses the cached payload.
+// Returns null on a non-OK response.
+async function fetchStatus(timeout) {
+    const headers = statusCache.etag ? { 'If-None-Match': statusCache.etag } : {};
+    
+    const response = await fetchWithTimeout(`${API_BASE_URL}/status`, {
+        headers,
+        cache: 'no-store',
+        timeout
+    });
+    
+    if (response.status === 304 && statusCache.data) {
+        return statusCache.data;
+    }
+    if (!response.ok) {
+        return null;
+    }
+    
+    statusCache = {
+        etag: response.headers.get('ETag'),
+        data: await response.json()
+    };
+    return statusCache.data;
+}
+
 // Timeout wrapper for fetch
 const fetchWithTimeout = async (url, options = {}) => {
     const { timeout = 8000 } = options;
@@ -0,0 +1,283 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+import ethical_layer
+from pdf_loader import stitch_chunks
+
+# Book-level summaries are stored with this chunk_index; sections use 0..n-1
+BOOK_LEVEL = -1
+
+SECTION_PROMPT = (
+    'Summarize the following passage from the book "{name}" in 4-6 sentences. '
+    "Keep the key names, events, arguments and terminology.\n\n"
+    "Passage:\n{text}\n\nSummary:"
+)
+
+REDUCE_PROMPT = (
+    'Below are summaries of consecutive parts of the book "{name}". '
+    "Combine them into one summary of {scope} that covers its main themes, "
+    "arguments and structure in one or two paragraphs.\n\n{text}\n\nSummary:"
+)
+
+# Questions about a whole book rather than a specific passage
+_BROAD_QUESTION = re.compile(
+    r"\b(summar(y|ise|ize|ies)|overview|main (themes?|ideas?|points?|arguments?|topics?)|"
+    r"key (themes?|ideas?|points?|takeaways?)|what('s| is) (this|the) book about|"
+    r"gist|synopsis|tl;?dr)\b",
+    re.IGNORECASE,
+)
+
+
+def is_broad_question(query):
+    return bool(_BROAD_QUESTION.search(query or ""))
+
+
+def _hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# Sentence starts: whitespace following sentence-ending punctuation
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])(?=\s)")
+
+
+def _is_cut_point(sentence, size):
+    """
+    Content-defined boundary test: a sentence ends a section with probability
+    about 2 * len(sentence) / size, decided by its own hash, so the same
+    sentence makes the same choice wherever it sits in the book.
+    """
+    digest = hashlib.blake2b(sentence.strip().encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") < min(1.0, 2 * len(sentence) / size) * 2 ** 64
+
+
+def split_sections(text, size):
+    """
+    Split text into sections of about `size` characters along sentence
+    boundaries chosen by content, not by offset. Sections are between size/2
+    and 2*size characters (except the last), so an insertion or deletion only
+    changes the sections around it and the rest keep their text and hashes.
+    """
+    min_len, max_len = size // 2, 2 * size
+
+    sentences = []
+    for sentence in _SENTENCE_BREAK.split(text):
+        # Text without punctuation would otherwise form one huge "sentence"
+        sentences.extend(sentence[i:i + max_len] for i in range(0, len(sentence), max_len))
+
+    sections = []
+    current = ""
+    for sentence in sentences:
+        if current and len(current) + len(sentence) > max_len:
+            sections.append(current)
+            current = ""
+        current += sentence
+        if len(current) >= min_len and _is_cut_point(sentence, size):
+            sections.append(current)
+            current = ""
+
+    if current:
+        sections.append(current)
+    return sections
+
+
+class SummaryIndexer:
+    """
+    Offline hierarchical summaries per book, stored in a secondary collection.
+
+    Each book is split into sections of about SUMMARY_SECTION_CHARS characters
+    at content-defined sentence boundaries. Every section is summarised (at
+    most SUMMARY_MAX_CONCURRENCY LLM calls at a time), and the section
+    summaries are reduced level by level into a single book summary.
+    Summaries are cached on disk per book, keyed by content hash. An unchanged
+    book is skipped outright. Because section boundaries follow the text, not
+    fixed offsets, an edited book only re-summarises the sections around each
+    edit.
+    """
+
+    def __init__(self, embedding_manager, milvus_manager, summary_milvus, chunk_settings=None):
+        self.embedding = embedding_manager
+        self.milvus = milvus_manager
+        self.summaries = summary_milvus
+        self.chunk_settings = chunk_settings or (lambda name: (config.CHUNK_SIZE, config.CHUNK_OVERLAP))
+        self.cache_dir = config.SUMMARY_CACHE_DIR
+
+        # Builds run one at a time, off the request path
+        self._worker = ThreadPoolExecutor(max_workers=1)
+        self._lock = threading.Lock()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    # ---------------------------------------------------------
+    # Cache
+    # ---------------------------------------------------------
+    def _cache_path(self, name):
+        return os.path.join(self.cache_dir, _hash(name)[:32] + ".json")
+
+    def _load_cache(self, name):
+        path = self._cache_path(name)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _save_cache(self, name, data):
+        path = self._cache_path(name)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    # ---------------------------------------------------------
+    # Summarisation
+    # ---------------------------------------------------------
+    def _summarize_all(self, prompts):
+        with ThreadPoolExecutor(max_workers=config.SUMMARY_MAX_CONCURRENCY) as pool:
+            return list(pool.map(ethical_layer.generate_response, prompts))
+
+    def _reduce(self, name, summaries):
+        """Merge summaries group by group until a single book summary remains."""
+        group = config.SUMMARY_REDUCE_GROUP
+        while len(summaries) > 1:
+            scope = "the whole book" if len(summaries) <= group else "this part of the book"
+            prompts = [
+                REDUCE_PROMPT.format(name=name, scope=scope, text="\n\n".join(summaries[i:i + group]))
+                for i in range(0, len(summaries), group)
+            ]
+            summaries = self._summarize_all(prompts)
+            if any(s is None for s in summaries):
+                return None
+        return summaries[0] if summaries else None
+
+    def _book_text(self, name):
+        """The book's stitched text, or None when it has no stored chunks."""
+        rows = self.milvus.get_file_chunks(name, output_fields=("chunk_index", "text"))
+        if not rows:
+            return None
+        _, overlap = self.chunk_settings(name)
+        return stitch_chunks([r["text"] for r in rows], overlap)
+
+    def build_book(self, name, force=False):
+        text = self._book_text(name)
+        if text is None:
+            return False
+
+        # Hash the stitched text so re-chunking alone doesn't trigger a rebuild
+        content_hash = _hash(text)
+        cache = self._load_cache(name)
+
+        if not force and cache.get("content_hash") == content_hash and self.summaries.has_file(name):
+            print(f"⏭️  Summaries up to date: {name}")
+            return True
+
+        print(f"🔄 Summarizing {name}")
+
+        sections = split_sections(text, config.SUMMARY_SECTION_CHARS)
+        section_hashes = [_hash(s) for s in sections]
+
+        # Reuse summaries of sections whose text hasn't changed
+        known = {s["hash"]: s["summary"] for s in cache.get("sections", [])}
+        todo = [i for i, h in enumerate(section_hashes) if h not in known]
+
+        fresh = self._summarize_all([SECTION_PROMPT.format(name=name, text=sections[i]) for i in todo])
+        if any(s is None for s in fresh):
+            print(f"✗ Summarizing failed: {name}")
+            return False
+        known.update((section_hashes[i], s) for i, s in zip(todo, fresh))
+
+        section_summaries = [known[h] for h in section_hashes]
+
+        if todo or not cache.get("book_summary"):
+            book_summary = self._reduce(name, section_summaries)
+            if book_summary is None:
+                print(f"✗ Summarizing failed: {name}")
+                return False
+        else:
+            book_summary = cache["book_summary"]
+
+        texts = section_summaries + [book_summary]
+        indices = list(range(len(section_summaries))) + [BOOK_LEVEL]
+        embeddings = self.embedding.embed_multiple(texts)
+        if embeddings is None:
+            return False
+
+        with self._lock:
+            # The LLM calls take minutes; drop this build if the book was
+            # deleted or changed meanwhile (a changed book is rescheduled)
+            if not self.milvus.has_file(name) or _hash(self._book_text(name) or "") != content_hash:
+                print(f"⏭️  {name} changed or was removed during its summary build; discarded")
+                return False
+
+            self.summaries.delete_file(name, compact=False)
+            if not self._insert(name, indices, texts, embeddings):
+                return False
+
+            self._save_cache(name, {
+                "file_name": name,
+                "content_hash": content_hash,
+                "sections": [{"hash": h, "summary": s} for h, s in zip(section_hashes, section_summaries)],
+                "book_summary": book_summary,
+            })
+
+        print(f"✓ Summaries built: {name} ({len(todo)}/{len(sections)} sections summarized)")
+        return True
+
+    def _insert(self, name, indices, texts, embeddings):
+        try:
+            self.summaries.insert_rows(
+                [f"{_hash(name)[:16]}-{i}" for i in indices],
+                [name] * len(texts),
+                indices,
+                texts,
+                [e.tolist() for e in embeddings],
+            )
+            self.summaries.flush()
+            return True
+        except Exception as e:
+            print(f"✗ Error inserting summaries for {name}: {e}")
+            return False
+
+    def build_all(self, names=None):
+        names = sorted(names if names is not None else self.milvus.get_all_embedded_files())
+        built = 0
+        for name in names:
+            try:
+                if self.build_book(name):
+                    built += 1
+            except Exception as e:
+                print(f"✗ Summary build error for {name}: {e}")
+
+        print(f"📊 Summary index: {built}/{len(names)} books ready")
+        return built
+
+    def schedule(self, names=None):
+        """Queue a background build for some books, or for all when `names` is None."""
+        return self._worker.submit(self.build_all, names)
+
+    def remove_book(self, name):
+        with self._lock:
+            self.summaries.delete_file(name)
+            path = self._cache_path(name)
+            if os.path.exists(path):
+                os.remove(path)
+
+    # ---------------------------------------------------------
+    # Retrieval
+    # ---------------------------------------------------------
+    def search(self, query_emb, n=None):
+        return self.summaries.search_embeddings(query_emb, n=n or config.SUMMARY_SEARCH_RESULTS)
+
+
+def format_summary_context(results):
+    parts = []
+    for r in results:
+        level = "Book summary" if r["chunk_index"] == BOOK_LEVEL else f"Section {r['chunk_index'] + 1} summary"
+        parts.append(f"[{r['file_name']} — {level}]\n{r['document']}")
+    return "\n\n".join(parts)
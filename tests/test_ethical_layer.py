@@ -0,0 +1,79 @@
+import os
+import random
+
+import pytest
+
+from ethical_layer import REDACTION, SafetyFilter
+
+TERMS = ["hate", "kill", "racial superiority", "ethnic cleansing", "genocide"]
+
+# Terms next to word characters must not match (\b), and shared prefixes
+# ("kill" / "killer" style) exercise the trie
+FILLER = ["skill", "killer", "hated", "racial", "superiority", "ethnic", "cleansings",
+          "the", "a", "of", "and", ".", ",", "!", "\n"]
+
+
+@pytest.fixture
+def safety(tmp_path):
+    path = tmp_path / "blocklist.txt"
+    path.write_text("\n".join(TERMS) + "\n", encoding="utf-8")
+    return SafetyFilter(path=str(path), reload_interval=0)
+
+
+def _random_text(rng, words):
+    return " ".join(rng.choice(TERMS + FILLER) for _ in range(words))
+
+
+def _random_split(rng, text):
+    chunks = []
+    pos = 0
+    while pos < len(text):
+        step = rng.randint(1, 12)
+        chunks.append(text[pos:pos + step])
+        pos += step
+    return chunks
+
+
+def test_redact_respects_word_boundaries(safety):
+    assert safety.redact("Hate and skill, killer, KILL.") == f"{REDACTION} and skill, killer, {REDACTION}."
+    assert safety.redact("racial  superiority") == "racial  superiority"
+    assert safety.redact("racial superiority!") == f"{REDACTION}!"
+
+
+@pytest.mark.parametrize("text", [
+    "they preached racial superiority openly",
+    "no ethnic cleansing here",
+    "skill kill killer",
+    "genocide",
+])
+def test_stream_catches_terms_split_at_every_position(safety, text):
+    expected = safety.redact(text)
+    for cut in range(len(text) + 1):
+        streamed = "".join(safety.redact_stream([text[:cut], text[cut:]]))
+        assert streamed == expected, cut
+
+
+def test_stream_matches_redact_for_random_splits(safety):
+    rng = random.Random(0)
+    for _ in range(2000):
+        text = _random_text(rng, rng.randint(0, 40))
+        streamed = "".join(safety.redact_stream(_random_split(rng, text)))
+        assert streamed == safety.redact(text)
+
+
+def test_stream_of_single_characters(safety):
+    text = "kill the hate, not the skill of ethnic cleansing"
+    assert "".join(safety.redact_stream(list(text))) == safety.redact(text)
+
+
+def test_hot_reload_picks_up_edited_file(safety):
+    assert safety.redact("hate and spam") == f"{REDACTION} and spam"
+
+    with open(safety.path, "w", encoding="utf-8") as f:
+        f.write("# edited\nspam\n")
+    # Make sure the mtime moves even on coarse-grained filesystems
+    stat = os.stat(safety.path)
+    os.utime(safety.path, (stat.st_atime, stat.st_mtime + 10))
+
+    assert safety.redact("hate and spam") == f"hate and {REDACTION}"
+    assert "".join(safety.redact_stream(["hate and s", "pam"])) == f"hate and {REDACTION}"
@@ -0,0 +1,57 @@
+import random
+import string
+
+import pytest
+
+from pdf_loader import (
+    infer_overlap,
+    overlap_fits,
+    split_text_into_chunks,
+    stitch_chunks,
+    validate_chunk_settings,
+)
+
+
+def _random_text(rng, words):
+    return " ".join(
+        "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(1, 12)))
+        for _ in range(words)
+    )
+
+
+@pytest.mark.parametrize("chunk_size,overlap", [(500, 50), (800, 80), (100, 2), (100, 3), (37, 5)])
+def test_stitch_round_trips_split(chunk_size, overlap):
+    rng = random.Random(chunk_size * 1000 + overlap)
+    for _ in range(200):
+        text = _random_text(rng, rng.randint(1, 600))
+        chunks = split_text_into_chunks(text, chunk_size=chunk_size, overlap=overlap)
+        assert stitch_chunks(chunks, overlap) == text
+
+
+@pytest.mark.parametrize("chunk_size,overlap", [(50, 50), (50, 60), (50, -1), (0, 0), ("500", 50), (500, 5.0), (500, True)])
+def test_invalid_chunk_settings_rejected(chunk_size, overlap):
+    with pytest.raises(ValueError):
+        validate_chunk_settings(chunk_size, overlap)
+    with pytest.raises(ValueError):
+        split_text_into_chunks("some text", chunk_size=chunk_size, overlap=overlap)
+
+
+@pytest.mark.parametrize("chunk_size,overlap", [(500, 50), (800, 80), (100, 3), (37, 5)])
+def test_inferred_overlap_stitches_exactly(chunk_size, overlap):
+    rng = random.Random(chunk_size * 1000 + overlap)
+    for _ in range(50):
+        text = _random_text(rng, rng.randint(200, 600))
+        chunks = split_text_into_chunks(text, chunk_size=chunk_size, overlap=overlap)
+        inferred = infer_overlap(chunks)
+        assert overlap - 2 <= inferred <= overlap
+        assert stitch_chunks(chunks, inferred) == text
+
+
+def test_overlap_fits_rejects_wrong_overlap():
+    rng = random.Random(7)
+    text = _random_text(rng, 400)
+    chunks = split_text_into_chunks(text, chunk_size=500, overlap=50)
+
+    assert overlap_fits(chunks, 50)
+    assert not overlap_fits(chunks, 80)
+    assert not overlap_fits(chunks, 20)
@@ -1,6 +1,7 @@
-
+import streamlit as st
 import requests
 import os
+import time
 from pathlib import Path
 
 
@@ -13,6 +14,37 @@ st.set_page_config(
 # API endpoint
 API_BASE_URL = os.getenv("API_BASE_URL", "http://127.0.0.1:5000")
 
+# Reuse a /status response for this long before revalidating it
+STATUS_CACHE_SECONDS = 5
+
+
+def fetch_status(timeout=10):
+    """
+    Return the /status payload, cached in session state. Within
+    STATUS_CACHE_SECONDS no request is made; after that the cached copy is
+    revalidated with If-None-Match and reused on a 304.
+    """
+    cached = st.session_state.get("status_cache")
+    if cached and time.time() - cached["fetched_at"] < STATUS_CACHE_SECONDS:
+        return cached["data"]
+
+    headers = {"If-None-Match": cached["etag"]} if cached and cached.get("etag") else {}
+    response = requests.get(f"{API_BASE_URL}/status", headers=headers, timeout=timeout)
+
+    if response.status_code == 304 and cached:
+        cached["fetched_at"] = time.time()
+        return cached["data"]
+
+    response.raise_for_status()
+    data = response.json()
+    st.session_state.status_cache = {
+        "data": data,
+        "etag": response.headers.get("ETag"),
+        "fetched_at": time.time(),
+    }
+    return data
+
+
 # Custom styling
 st.markdown("""
     <style>
@@ -63,14 +95,17 @@ with tab1:
         # Get response from API
         try:
             with st.spinner("🔄 Searching and generating response..."):
+                # The server keeps this conversation's turns and retrieved
+                # chunks under session_id, so follow-ups are context-aware
                 response = requests.post(
                     f"{API_BASE_URL}/query",
-                    json={"query": user_input},
+                    json={"query": user_input, "session_id": st.session_state.get("session_id", "")},
                     timeout=30
                 )
                 
                 if response.status_code == 200:
                     response_data = response.json()
+                    st.session_state.session_id = response_data.get("session_id", "")
                     bot_response = response_data.get("answer", "No response generated.")
                     file_names = response_data.get("file_names", [])
                     num_results = response_data.get("num_results", 0)
@@ -101,12 +136,13 @@ with tab2:
     
     try:
         with st.spinner("Loading books..."):
-            response = requests.get(f"{API_BASE_URL}/status", timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
+            data = fetch_status(timeout=10)
+
+            if data:
                 embedded_files = data.get("embedded_files", [])
                 total_files = data.get("total_files", 0)
+                books = data.get("books", {})
+                updated_at = data.get("updated_at")
                 
                 # Display statistics
                 col1, col2, col3 = st.columns(3)
@@ -115,7 +151,10 @@ with tab2:
                 with col2:
                     st.metric("✅ Status", "Running")
                 with col3:
-                    st.metric("🔄 Last Updated", "Now")
+                    st.metric(
+                        "🔄 Last Updated",
+                        time.strftime("%H:%M:%S", time.localtime(updated_at)) if updated_at else "—"
+                    )
                 
                 # Display books list
                 if embedded_files:
@@ -127,7 +166,11 @@ with tab2:
                         with col1:
                             st.markdown(f"**{idx}. {file_name}**")
                         with col2:
-                            st.write("✓ Embedded")
+                            book = books.get(file_name, {})
+                            details = [f"{book['chunks']} chunks"] if book.get("chunks") else []
+                            if book.get("pages"):
+                                details.append(f"{book['pages']} pages")
+                            st.write("✓ " + (" · ".join(details) or "Embedded"))
                 else:
                     st.info("📭 No books embedded yet. Upload a PDF to get started!")
             else:
@@ -135,6 +178,8 @@ with tab2:
     
     except requests.exceptions.ConnectionError:
         st.error("❌ Cannot connect to API. Make sure the backend is running.")
+    except requests.exceptions.HTTPError:
+        st.error("Could not fetch book list from API")
     except Exception as e:
         st.error(f"❌ Error fetching books: {str(e)}")
 
@@ -207,11 +252,10 @@ with st.sidebar:
     
     # API connection status
     try:
-        response = requests.get(f"{API_BASE_URL}/status", timeout=5)
-        if response.status_code == 200:
-            st.success("✅ Backend Connected")
-        else:
-            st.warning("⚠️ Backend Error")
+        fetch_status(timeout=5)
+        st.success("✅ Backend Connected")
+    except requests.exceptions.HTTPError:
+        st.warning("⚠️ Backend Error")
     except:
         st.error("❌ Backend Offline")
     